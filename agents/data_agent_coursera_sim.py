@@ -11,8 +11,6 @@ import pytz
 
 from .base_agent import BaseAgent
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Timezone mapping from abbreviated names to IANA identifiers
@@ -211,7 +211,7 @@ class ChatWidget(QWidget):
             is_user: Whether this is a user message
             thinking: Optional thinking content for assistant messages
         """
-        logger.info("Adding message to chat - User: %s, Text: %s", is_user, text[:50])
+        logger.info("Adding message to chat - User: %s, Text: %.50s", is_user, text)
         if thinking:
             logger.info("Message includes thinking content (%d chars)", len(thinking))
         
@@ -242,7 +242,7 @@ class ChatWidget(QWidget):
         """Send a message from the input field."""
         text = self.chat_input.text().strip()
         if text:
-            logger.info("Sending message: %s", text[:50])
+            logger.info("Sending message: %.50s", text)
             # Add message to chat display
             self.add_message(text, is_user=True)
             self.chat_input.clear()
@@ -7,8 +7,6 @@ import re
 import logging
 from typing import Dict, List, Optional
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ConstitutionManager:
@@ -18,8 +18,15 @@ import queue
 # Import for LLM interaction with Claude
 from llm_providers import AnthropicProvider
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Try to import orjson (optional, for faster JSON parsing)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
 logger = logging.getLogger(__name__)
 
 
@@ -62,21 +69,22 @@ class EmailDataAgent:
         """
         try:
             if not os.path.exists(data_file):
-                logger.error(f"Data file not found: {data_file}")
+                logger.error("Data file not found: %s", data_file)
                 return False
 
-            with open(data_file, 'r', encoding='utf-8') as f:
-                self.emails = json.load(f)
+            # Both parsers accept UTF-8 bytes directly, skipping the text decoder
+            with open(data_file, 'rb') as f:
+                self.emails = _loads(f.read())
 
             # Build lookup dictionary
             self.email_by_id = {email["message_id"]
                 : email for email in self.emails}
 
-            logger.info(f"Loaded {len(self.emails)} emails from {data_file}")
+            logger.info("Loaded %d emails from %s", len(self.emails), data_file)
             return True
 
         except (ValueError, IOError, json.JSONDecodeError) as e:
-            logger.error(f"Error loading email data: {e}")
+            logger.error("Error loading email data: %s", e)
             return False
 
     def get_data(self) -> List[Dict[str, Any]]:
@@ -133,7 +141,7 @@ class EmailDataAgent:
                 result.append(formatted_email)
 
             except (KeyError, TypeError) as e:
-                logger.warning(f"Error formatting email: {e}")
+                logger.warning("Error formatting email: %s", e)
 
         return result
 
@@ -165,7 +173,7 @@ class EmailDataAgent:
                 logger.info("Created default AnthropicProvider")
                 return True
             except (ValueError, ImportError) as e:
-                logger.error(f"Failed to create LLM provider: {e}")
+                logger.error("Failed to create LLM provider: %s", e)
                 return False
 
         return True
@@ -215,7 +223,7 @@ class EmailDataAgent:
             return result
 
         except Exception as e:
-            logger.error(f"Error calling LLM for correlation: {e}")
+            logger.error("Error calling LLM for correlation: %s", e)
             return {
                 "is_related": False,
                 "confidence": 0,
@@ -312,7 +320,7 @@ EXPLANATION: [Brief explanation of relationship in 25 words or less]
             return result
 
         except Exception as e:
-            logger.error(f"Error parsing correlation response: {e}")
+            logger.error("Error parsing correlation response: %s", e)
             return result
 
     def _filter_candidate_emails(self, activity: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -415,11 +423,11 @@ EXPLANATION: [Brief explanation of relationship in 25 words or less]
 
         if not candidates:
             logger.info(
-                f"No candidate emails found for activity: {activity.get('Title', '')}")
+                "No candidate emails found for activity: %s", activity.get('Title', ''))
             return []
 
         logger.info(
-            f"Found {len(candidates)} candidate emails for correlation")
+            "Found %d candidate emails for correlation", len(candidates))
 
         # Perform LLM correlation for each candidate
         correlated_emails = []
@@ -467,7 +475,7 @@ EXPLANATION: [Brief explanation of relationship in 25 words or less]
         self.is_correlating = True
         self.correlation_thread.start()
         logger.info(
-            f"Started background correlation for {len(activities)} activities")
+            "Started background correlation for %d activities", len(activities))
 
     def _background_correlation_worker(self, activities: List[Dict[str, Any]]) -> None:
         """Background worker that processes correlations.
@@ -485,13 +493,13 @@ EXPLANATION: [Brief explanation of relationship in 25 words or less]
                 # Process correlation
                 correlated = self.find_correlations(activity)
                 logger.debug(
-                    f"Found {len(correlated)} correlated emails for activity {activity_id}")
+                    "Found %d correlated emails for activity %s", len(correlated), activity_id)
 
                 # Add small delay to avoid overloading LLM API
                 time.sleep(0.5)
 
         except Exception as e:
-            logger.error(f"Error in background correlation: {e}")
+            logger.error("Error in background correlation: %s", e)
         finally:
             self.is_correlating = False
             logger.info("Background correlation completed")
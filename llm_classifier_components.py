@@ -12,8 +12,6 @@ from llm_components import LLMComponent, Message, MessageType
 from llm_providers import LLMBaseProvider
 from constitution_manager import ConstitutionManager
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class InputClassifierComponent(LLMComponent):
@@ -61,7 +59,7 @@ class InputClassifierComponent(LLMComponent):
         
         try:
             self.send_status("Validating input...")
-            logger.info("%s validating input: %s", self.name, message.content[:50])
+            logger.info("%s validating input: %.50s", self.name, message.content)
             
             # Load the full constitution for context
             constitution_text = self.constitution_manager.load_constitution(self.constitution_name)
@@ -112,7 +110,7 @@ class InputClassifierComponent(LLMComponent):
                     classification = result
                     thinking = None
                 
-                logger.info("%s classification result: %s", self.name, classification[:20])
+                logger.info("%s classification result: %.20s", self.name, classification)
                 
                 # Process the classification result
                 if classification.upper().startswith("VALID"):
@@ -141,7 +139,7 @@ class InputClassifierComponent(LLMComponent):
                             "classification": "invalid"
                         }
                     )
-                    logger.info("%s message rejected: %s", self.name, reason[:50])
+                    logger.info("%s message rejected: %.50s", self.name, reason)
                     
                     # Send error message directly to UI component
                     if hasattr(self, 'ui_component'):
@@ -218,7 +216,7 @@ class OutputClassifierComponent(LLMComponent):
         
         try:
             self.send_status("Validating output...")
-            logger.info("%s validating output: %s", self.name, message.content[:50])
+            logger.info("%s validating output: %.50s", self.name, message.content)
             
             # Load the full constitution for context
             constitution_text = self.constitution_manager.load_constitution(self.constitution_name)
@@ -267,7 +265,7 @@ class OutputClassifierComponent(LLMComponent):
                     classification = result
                     thinking = None
                 
-                logger.info("%s classification result: %s", self.name, classification[:20])
+                logger.info("%s classification result: %.20s", self.name, classification)
                 
                 # Process the classification result
                 if classification.upper().startswith("VALID"):
@@ -300,7 +298,7 @@ class OutputClassifierComponent(LLMComponent):
                             "classification": "invalid"
                         }
                     )
-                    logger.info("%s message rejected: %s", self.name, reason[:50])
+                    logger.info("%s message rejected: %.50s", self.name, reason)
                     
                     # Send error message directly to UI component
                     if hasattr(self, 'ui_component'):
@@ -9,8 +9,6 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional, List, Callable
 from enum import Enum
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +25,9 @@ class MessageType(Enum):
 class Message:
     """Message object that flows through the pipeline."""
     
+    # One Message is created per pipeline hop, so skip the per-instance __dict__
+    __slots__ = ('content', 'type', 'metadata', 'thinking')
+    
     def __init__(self, content: str, msg_type: MessageType, 
                  metadata: Optional[Dict[str, Any]] = None,
                  thinking: Optional[str] = None):
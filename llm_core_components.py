@@ -11,8 +11,6 @@ from typing import List, Dict, Any
 from llm_components import LLMComponent, Message, MessageType
 from llm_providers import LLMBaseProvider
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -109,7 +107,7 @@ class CoreLLMComponent(LLMComponent):
             return
             
         # Log that we received a message to process
-        logger.info("CoreLLM received message to process: %s", message.content[:50])
+        logger.info("CoreLLM received message to process: %.50s", message.content)
         
         try:
             self.send_status("Processing message with conversation history...")
@@ -172,7 +170,7 @@ class CoreLLMComponent(LLMComponent):
                 )
                 
                 self.send_status("Response generated")
-                logger.info("Sending response back to UI: %s", content[:50])
+                logger.info("Sending response back to UI: %.50s", content)
                 self.send_output(output_message)
                 
             except concurrent.futures.TimeoutError:
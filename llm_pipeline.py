@@ -14,8 +14,6 @@ from llm_providers import AnthropicProvider, OpenAIProvider, LLMBaseProvider
 from llm_ui_components import ChatUIComponent, StatusManager
 from constitution_manager import ConstitutionManager
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -10,18 +10,8 @@ import concurrent.futures
 from typing import Optional, Union, Tuple
 import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-try:
-    import anthropic
-    HAS_ANTHROPIC = True
-    logger.info("Anthropic library imported successfully")
-except ImportError:
-    HAS_ANTHROPIC = False
-    logger.error("Failed to import anthropic library - make sure it's installed")
-
 try:
     import openai
     HAS_OPENAI = True
@@ -78,13 +68,16 @@ class AnthropicProvider:
     def client(self):
         """Lazy-load the Anthropic client to avoid import overhead if not used."""
         if self._client is None:
-            if not HAS_ANTHROPIC:
+            # Deferred so the anthropic/httpx/pydantic stack only loads when a request is made
+            try:
+                import anthropic  # pylint: disable=import-outside-toplevel
+            except ImportError as e:
                 error_msg = (
                     "The anthropic package is required. "
                     "Install it with: pip install anthropic"
                 )
                 logger.error(error_msg)
-                raise ImportError(error_msg)
+                raise ImportError(error_msg) from e
             try:
                 self._client = anthropic.Anthropic(api_key=self.api_key)
                 logger.info("Initialized Anthropic client with model %s", self.model)
@@ -147,7 +140,7 @@ class AnthropicProvider:
             Either response text, or tuple of (response, thinking)
         """
         try:
-            logger.info("Generating response for prompt: %s", prompt[:50])
+            logger.info("Generating response for prompt: %.50s", prompt)
             
             # Prepare the messages format
             messages = kwargs.get('messages', [{"role": "user", "content": prompt}])
@@ -173,7 +166,7 @@ class AnthropicProvider:
             # Add system message if provided
             if system:
                 api_params["system"] = system
-                logger.info("Using system prompt: %s", system[:50])
+                logger.info("Using system prompt: %.50s", system)
             
             # Add thinking parameter if enabled and adjust other parameters accordingly
             if self._thinking_enabled:
@@ -222,15 +215,18 @@ class AnthropicProvider:
                 response_text = None
                 thinking_text = None
                 
-                # Process each content block based on type
-                for content_block in message.content:
-                    if hasattr(content_block, 'type'):
-                        if content_block.type == 'text' and hasattr(content_block, 'text'):
-                            response_text = content_block.text
-                            logger.info("Extracted text response: %s", response_text[:50])
-                        elif (content_block.type == 'thinking' and 
-                              hasattr(content_block, 'thinking')):
-                            thinking_text = content_block.thinking
+                # Process each content block based on type (one attribute lookup per field)
+                for content_block in getattr(message, 'content', None) or ():
+                    block_type = getattr(content_block, 'type', None)
+                    if block_type == 'text':
+                        text = getattr(content_block, 'text', None)
+                        if text is not None:
+                            response_text = text
+                            logger.info("Extracted text response: %.50s", response_text)
+                    elif block_type == 'thinking':
+                        thinking = getattr(content_block, 'thinking', None)
+                        if thinking is not None:
+                            thinking_text = thinking
                             logger.info("Extracted thinking (%d chars)", len(thinking_text))
                 
                 # Make sure we have a response text
@@ -9,11 +9,6 @@ from PySide6.QtCore import QObject, Signal, Slot, QTimer
 
 from llm_components import LLMComponent, Message, MessageType
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
@@ -44,7 +39,7 @@ class ChatUIComponent(LLMComponent):
     @Slot(str)
     def handle_message_sent(self, text: str) -> None:
         """Handle a message sent from the chat widget."""
-        logger.info("User message: %s", text[:50])
+        logger.info("User message: %.50s", text)
         
         message = Message(
             content=text,
@@ -65,7 +60,7 @@ class ChatUIComponent(LLMComponent):
             self.chat_widget.add_message(message.content, is_user=False, thinking=message.thinking)
             
         elif message.type in [MessageType.CORE_RESPONSE, MessageType.VALIDATED_OUTPUT]:
-            logger.info("LLM response: %s", message.content[:50])
+            logger.info("LLM response: %.50s", message.content)
             
             # Check if the message has thinking content
             thinking = message.thinking
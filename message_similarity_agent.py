@@ -12,29 +12,83 @@ Date: April 2025
 
 import os
 import json
+import contextlib
+import functools
+import hashlib
+import heapq
 import logging
+import multiprocessing
 import threading
 import queue
 import time
-from typing import List, Dict, Any, Optional, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, FrozenSet, Iterator, Optional, Tuple, Union
 from dataclasses import dataclass
 import re
 from datetime import datetime
 
 # Import sklearn components for vector similarity
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
+    import sklearn
+    from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import normalize
+    from scipy import sparse
     import numpy as np
+    import joblib
     HAS_SKLEARN = True
 except ImportError:
     HAS_SKLEARN = False
     logging.warning("scikit-learn not installed - vector similarity will be unavailable")
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Try to import orjson (optional, for faster message parsing and result serialization)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+
+@contextlib.contextmanager
+def _replace_on_success(output_file: str, mode: str = 'wb', **open_kwargs) -> Iterator[Any]:
+    """Open a temporary file next to output_file that replaces it only if the block succeeds.
+    
+    A failure partway through a write removes the temporary file and leaves any
+    previous output_file untouched, instead of a truncated, unparseable one.
+    """
+    temp_file = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp_file, mode, **open_kwargs) as f:
+            yield f
+        os.replace(temp_file, output_file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+# Fixed patterns used by text standardization, date parsing and term matching
+_WHITESPACE_RE = re.compile(r'\s+')
+_MODULE_REF_RE = re.compile(r'module\s*(\d+)')
+_PROBLEM_SET_REF_RE = re.compile(r'problem\s*set\s*(\d+)')
+_ASSIGNMENT_REF_RE = re.compile(r'assignment\s*(\d+)')
+_ORDINAL_SUFFIX_RE = re.compile(r'(\d+)(st|nd|rd|th)')
+_WORD_RE = re.compile(r'\b\w{3,}\b')
+
+# Activities scored per matrix product in process_correlations, capped so each
+# dense block of float32 scores stays around cache size for large message sets
+_SIMILARITY_BLOCK_ROWS = 256
+_SIMILARITY_BLOCK_BYTES = 4 << 20
+
+# Seconds of background correlation work between yields to the UI thread (one frame)
+_UI_YIELD_INTERVAL = 0.016
+
+# Common English stopwords ignored when reporting shared key terms
+_STOPWORDS = frozenset({"the", "and", "for", "this", "that", "with", "from", "have",
+                        "was", "are", "has", "been", "were", "will", "any", "all"})
+
 # Default configuration
 DEFAULT_CONFIG = {
     "message_type": "email",  # "email" or "slack"
@@ -45,7 +99,7 @@ DEFAULT_CONFIG = {
     },
     "entity_extraction": {
         "course_code_pattern": r'\b[A-Z]{2,4}\s?\d{3,4}[A-Z]?\b',  # CS101, MATH 200
-        "module_pattern": r'\bmodules?\s*(\d+)\b|\bmodules?\s*([0-9]+[A-Za-z]?)\b',
+        "module_pattern": r'\bmodules?\s*(\d+[A-Za-z]?)\b',
         "assignment_pattern": r'\b(?:problem ?sets?|assignments?|labs?|exercises?|homeworks?)\s*(?:#|No\.?|Number|)?\s*(\d+[A-Za-z]?)\b',
         "date_pattern": r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?\b'
     },
@@ -54,6 +108,13 @@ DEFAULT_CONFIG = {
         "exclude_substrings": ["Automatic Reply", "Out of Office"],  # Substrings to exclude
         "ngram_range": [1, 3],  # Range of n-grams for TF-IDF
         "tfidf_min_df": 2,      # Minimum document frequency for TF-IDF
+        "tfidf_max_df": 1.0,    # Maximum document frequency (fraction) for TF-IDF
+        "tfidf_max_features": None,  # Cap on TF-IDF vocabulary size (None = unlimited)
+        "tfidf_sublinear_tf": False,  # Use 1 + log(tf) instead of raw term counts
+        "vectorizer": "tfidf",  # "tfidf" or "hashing" (stateless, no IDF weighting)
+        "hashing_n_features": 2 ** 18,  # Feature space size for the hashing vectorizer
+        "hashing_idf": False,   # Reweight hashed counts with IDF fitted on the corpus
+        "index_cache_dir": None,  # Directory caching fitted message indexes between runs
     },
     "correlation": {
         "threshold_strong": 0.5,             # Threshold for strong correlation
@@ -70,6 +131,8 @@ DEFAULT_CONFIG = {
         "max_correlations_per_activity": 5,  # Maximum correlations to return
         "compute_immediately": True,         # Compute on load
         "background_processing": True,       # Process in background
+        "background_workers": 1,             # Worker processes for background correlation (0 = all cores)
+        "correlation_workers": 1,            # Worker processes for process_correlations (0 = all cores)
     }
 }
 
@@ -101,7 +164,8 @@ SLACK_CONFIG_OVERRIDES = {
     }
 }
 
-@dataclass
+# slots=True needs Python 3.10+; the project requires 3.11 (readme.txt, requirements.txt)
+@dataclass(slots=True)
 class CorrelationEvidence:
     """Stores evidence for why a correlation was detected."""
     tfidf_similarity: float = 0.0
@@ -139,7 +203,7 @@ class CorrelationEvidence:
         return f"Evidence: {', '.join(summary_parts)} (TF-IDF: {self.tfidf_similarity:.2f})"
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageCorrelation:
     """Represents a correlation between an activity and a message (email or Slack)."""
     message_id: str
@@ -188,7 +252,7 @@ class EntityExtractor:
         )
         self.module_pattern = self.entity_extraction_config.get(
             "module_pattern", 
-            r'\bmodules?\s*(\d+)\b|\bmodules?\s*([0-9]+[A-Za-z]?)\b'
+            r'\bmodules?\s*(\d+[A-Za-z]?)\b'
         )
         self.assignment_pattern = self.entity_extraction_config.get(
             "assignment_pattern", 
@@ -198,38 +262,38 @@ class EntityExtractor:
             "date_pattern", 
             r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?\b'
         )
+        
+        # Compile the configured patterns once
+        self._course_code_re = re.compile(self.course_code_pattern, re.IGNORECASE)
+        self._module_re = re.compile(self.module_pattern, re.IGNORECASE)
+        self._assignment_re = re.compile(self.assignment_pattern, re.IGNORECASE)
+        self._date_re = re.compile(self.date_pattern)
     
     def extract_course_codes(self, text: str) -> List[str]:
         """Extract course codes like CS101, MATH 200."""
         if not text:
             return []
-        matches = re.findall(self.course_code_pattern, text, re.IGNORECASE)
-        return [match.strip() for match in matches]
+        return [match.strip() for match in self._course_code_re.findall(text)]
     
     def extract_module_numbers(self, text: str) -> List[str]:
         """Extract module numbers like 'Module 7' or 'Module 08'."""
         if not text:
             return []
-        matches = re.findall(self.module_pattern, text, re.IGNORECASE)
-        # Flatten tuples and filter empty matches
+        # Patterns with several groups yield tuples; flatten them and filter empty matches
         result = []
-        for match_tuple in matches:
-            if isinstance(match_tuple, tuple):
-                for m in match_tuple:
-                    if m:
-                        # Standardize module numbers (remove leading zeros)
-                        std_num = m.lstrip('0')
-                        if std_num:  # Ensure we're not adding empty strings
-                            result.append(std_num)
-            else:
-                result.append(match_tuple)
+        for match in self._module_re.findall(text):
+            for m in (match if isinstance(match, tuple) else (match,)):
+                # Standardize module numbers (remove leading zeros)
+                std_num = m.lstrip('0')
+                if std_num:  # Ensure we're not adding empty strings
+                    result.append(std_num)
         return result
     
     def extract_assignment_numbers(self, text: str) -> List[str]:
         """Extract assignment/problem set numbers."""
         if not text:
             return []
-        matches = re.findall(self.assignment_pattern, text, re.IGNORECASE)
+        matches = self._assignment_re.findall(text)
         # Handle potential tuple matches
         result = []
         for match in matches:
@@ -245,17 +309,30 @@ class EntityExtractor:
         """Extract dates in standard format."""
         if not text:
             return []
-        matches = re.findall(self.date_pattern, text)
-        return [match.strip() for match in matches]
+        return [match.strip() for match in self._date_re.findall(text)]
     
     @staticmethod
     def standardize_date(date_str: str) -> Optional[datetime]:
-        """Convert date strings to standard datetime objects."""
+        """Convert date strings to standard datetime objects.
+        
+        Dates without a year are placed in the current year.
+        """
+        return EntityExtractor._standardize_date_in_year(date_str, datetime.now().year)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _standardize_date_in_year(date_str: str, current_year: int) -> Optional[datetime]:
+        """Parse a date string, using current_year when it has no year.
+        
+        Results are memoized since messages share a small set of date strings
+        and each miss may try several strptime formats. The year is part of the
+        key so a long-running agent does not keep last year's dates after New Year.
+        """
         if not date_str:
             return None
         
         # Remove ordinal suffixes
-        date_str = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
+        date_str = _ORDINAL_SUFFIX_RE.sub(r'\1', date_str)
         
         # Try different date formats
         formats = [
@@ -272,7 +349,7 @@ class EntityExtractor:
                 dt = datetime.strptime(date_str, fmt)
                 # Set year to current if not specified
                 if dt.year == 1900:
-                    dt = dt.replace(year=datetime.now().year)
+                    dt = dt.replace(year=current_year)
                 return dt
             except ValueError:
                 continue
@@ -314,14 +391,18 @@ class TextPreprocessor:
         text = text.lower()
         
         # Replace multiple spaces with a single space
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
-        # Standardize module references
-        text = re.sub(r'module\s*(\d+)', r'module \1', text)
+        # Standardize module references (substring checks skip the regex
+        # scan for the common case where the keyword never appears)
+        if 'module' in text:
+            text = _MODULE_REF_RE.sub(r'module \1', text)
         
         # Standardize problem set references
-        text = re.sub(r'problem\s*set\s*(\d+)', r'problemset \1', text)
-        text = re.sub(r'assignment\s*(\d+)', r'assignment \1', text)
+        if 'problem' in text:
+            text = _PROBLEM_SET_REF_RE.sub(r'problemset \1', text)
+        if 'assignment' in text:
+            text = _ASSIGNMENT_REF_RE.sub(r'assignment \1', text)
         
         return text.strip()
     
@@ -407,43 +488,100 @@ class TextPreprocessor:
         
         return self.standardize_text(text)
     
-    def fit_vectorizer(self, texts: List[str]) -> None:
-        """Fit TF-IDF vectorizer on a corpus of texts."""
+    def fit_vectorizer(self, texts: List[str]):
+        """Fit TF-IDF vectorizer on a corpus of texts.
+        
+        With preprocessing.vectorizer set to "hashing", a stateless
+        HashingVectorizer is used instead; it needs no fit, so vectors do not
+        depend on the rest of the corpus, at the cost of IDF weighting.
+        Setting preprocessing.hashing_idf restores IDF weighting on top of the
+        hashed counts, keeping the vocabulary-free memory footprint but making
+        the vectors depend on the fitted corpus again.
+        
+        Returns:
+            Sparse matrix with one vector per text, from the same pass that
+            fitted the vectorizer (None if scikit-learn is unavailable)
+        """
         if not HAS_SKLEARN:
             logger.error("scikit-learn is not installed - cannot create vectorizer")
-            return
+            return None
         
         # Get n-gram range from config
         ngram_range = self.preprocessing_config.get("ngram_range", [1, 3])
         if isinstance(ngram_range, list) and len(ngram_range) == 2:
             ngram_range = tuple(ngram_range)
         
+        if self.preprocessing_config.get("vectorizer", "tfidf") == "hashing":
+            if self.preprocessing_config.get("hashing_idf", False):
+                # Raw hashed counts feed the IDF transformer, which normalizes after reweighting
+                self.vectorizer = make_pipeline(
+                    HashingVectorizer(
+                        stop_words='english',
+                        ngram_range=ngram_range,
+                        n_features=self.preprocessing_config.get("hashing_n_features", 2 ** 18),
+                        alternate_sign=False,
+                        norm=None,
+                        dtype=np.float32
+                    ),
+                    TfidfTransformer(
+                        sublinear_tf=self.preprocessing_config.get("tfidf_sublinear_tf", False)
+                    )
+                )
+                vectors = self.vectorizer.fit_transform(texts)
+                logger.info("Fitted hashed TF-IDF vectorizer on %d texts", len(texts))
+                return vectors
+            
+            self.vectorizer = HashingVectorizer(
+                stop_words='english',
+                ngram_range=ngram_range,
+                n_features=self.preprocessing_config.get("hashing_n_features", 2 ** 18),
+                alternate_sign=False,
+                norm='l2',
+                dtype=np.float32
+            )
+            logger.info("Using stateless hashing vectorizer with %d features",
+                        self.vectorizer.n_features)
+            return self.vectorizer.transform(texts)
+        
         # Get minimum document frequency from config    
         min_df = self.preprocessing_config.get("tfidf_min_df", 2)
         
+        # float32 halves the memory traffic of the cosine products; the scores
+        # only need enough precision to fall into the right threshold bucket.
+        # Optional vocabulary pruning means fewer non-zeros in every product.
         self.vectorizer = TfidfVectorizer(
             stop_words='english',
             ngram_range=ngram_range,
-            min_df=min_df
+            min_df=min_df,
+            max_df=self.preprocessing_config.get("tfidf_max_df", 1.0),
+            max_features=self.preprocessing_config.get("tfidf_max_features"),
+            sublinear_tf=self.preprocessing_config.get("tfidf_sublinear_tf", False),
+            dtype=np.float32
         )
-        self.vectorizer.fit(texts)
+        # fit_transform tokenizes each text once and reweights the counts in place
+        vectors = self.vectorizer.fit_transform(texts)
         logger.info("Fitted TF-IDF vectorizer on %d texts", len(texts))
+        return vectors
 
 
 class CorrelationAnalyzer:
     """Analyze correlations between activities and messages with configuration-driven behavior."""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], preprocessor: Optional[TextPreprocessor] = None):
         """Initialize analyzer with configuration.
         
         Args:
             config: Configuration dictionary
+            preprocessor: Preprocessor to share with the caller; a new one is
+                created from config if not given
         """
         self.config = config
         self.correlation_config = config.get("correlation", {})
         self.message_type = config.get("message_type", "email")
-        self.preprocessor = TextPreprocessor(config)
-        self.entity_extractor = EntityExtractor(config)
+        if preprocessor is None:
+            preprocessor = TextPreprocessor(config)
+        self.preprocessor = preprocessor
+        self.entity_extractor = preprocessor.entity_extractor
     
     def calculate_date_proximity(self, activity_date: str, message_date: str) -> Optional[int]:
         """Calculate proximity between activity and message dates in days."""
@@ -470,26 +608,176 @@ class CorrelationAnalyzer:
         # Linear decay of boost based on days difference
         return max_boost * (1 - (days_diff / max_days))
     
+    def date_proximity_boosts(self, activity_date: Optional[datetime],
+                              message_dates: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_date_proximity_boost for one activity against many messages.
+        
+        Args:
+            activity_date: Standardized activity date, or None
+            message_dates: datetime64[D] array of message dates (NaT where unknown)
+            
+        Returns:
+            Array of date proximity boosts, one per message
+        """
+        max_days = self.correlation_config.get("date_proximity_days", 3)
+        max_boost = self.correlation_config.get("date_proximity_boost_max", 0.1)
+        
+        if activity_date is None:
+            return np.zeros(len(message_dates))
+        if max_days <= 0:
+            return np.full(len(message_dates), max_boost, dtype=float)
+        
+        days = np.abs((message_dates - np.datetime64(activity_date, 'D')).astype(np.int64))
+        in_range = ~np.isnat(message_dates) & (days <= max_days)
+        return np.where(in_range, max_boost * (1 - (days / max_days)), 0.0)
+    
+    def entity_boost_bounds(self, activity: Dict[str, Any], activity_prepared: Dict[str, Any],
+                            entity_index: Dict[str, Any], n_messages: int) -> np.ndarray:
+        """Upper-bound the course/module/assignment boosts of one activity against all messages.
+        
+        Uses the inverted indexes built by MessageSimilarityAgent.preprocess_data, so
+        only messages sharing an entity with the activity get the matching boost.
+        
+        Args:
+            activity: Activity data dictionary
+            activity_prepared: prepare_item() output for the activity
+            entity_index: Inverted indexes from entity to message row numbers
+            n_messages: Number of message rows
+            
+        Returns:
+            Array with an upper bound on the entity boosts for each message
+        """
+        course_hits = np.zeros(n_messages, dtype=bool)
+        for code in activity_prepared["course_codes_lc"]:
+            course_hits[entity_index["course_codes"].get(code, [])] = True
+        
+        # Messages whose course context appears in the activity course can also match
+        activity_course = activity.get("Course")
+        if isinstance(activity_course, str):
+            activity_course = activity_course.lower()
+            for context, rows in entity_index["course_contexts"].items():
+                if context in activity_course:
+                    course_hits[rows] = True
+        
+        module_hits = np.zeros(n_messages, dtype=bool)
+        for number in activity_prepared["module_numbers_set"]:
+            module_hits[entity_index["module_numbers"].get(number, [])] = True
+        
+        assignment_hits = np.zeros(n_messages, dtype=bool)
+        for number in activity_prepared["assignment_numbers_set"]:
+            assignment_hits[entity_index["assignment_numbers"].get(number, [])] = True
+        
+        return (max(0.0, self.correlation_config.get("course_match_boost", 0.2)) * course_hits +
+                max(0.0, self.correlation_config.get("module_match_boost", 0.15)) * module_hits +
+                max(0.0, self.correlation_config.get("assignment_match_boost", 0.15)) * assignment_hits)
+    
     def find_common_terms(self, text1: str, text2: str) -> List[str]:
         """Find common important terms between two texts."""
         # Simple implementation - in production we'd use a more sophisticated approach
         # with ranked term importance
-        words1 = set(re.findall(r'\b\w{3,}\b', text1.lower()))
-        words2 = set(re.findall(r'\b\w{3,}\b', text2.lower()))
+        return self.common_terms(self.word_set(text1), self.word_set(text2))
+    
+    @staticmethod
+    def word_set(text: str) -> FrozenSet[str]:
+        """Return the words of three or more characters in a text, minus stopwords."""
+        # Stopwords are dropped here, once per document, rather than per pair
+        return frozenset(_WORD_RE.findall(text.lower())) - _STOPWORDS
+    
+    @staticmethod
+    def common_terms(words1: FrozenSet[str], words2: FrozenSet[str]) -> List[str]:
+        """Find common important terms between two word_set() results, sorted.
         
-        # Filter out common English stopwords
-        stopwords = {"the", "and", "for", "this", "that", "with", "from", "have", 
-                    "was", "are", "has", "been", "were", "will", "any", "all"}
-        common_terms = words1.intersection(words2) - stopwords
+        Sorting keeps the order independent of set iteration, which differs between
+        processes once the word sets have been pickled to a worker.
+        """
+        return sorted(words1 & words2)
+    
+    @staticmethod
+    def sparse_cosine(vector1, vector2) -> float:
+        """Cosine similarity of two sparse row vectors without a dense result matrix."""
+        norms = np.sqrt(vector1.multiply(vector1).sum() * vector2.multiply(vector2).sum())
+        if not norms:
+            return 0.0
+        return float(vector1.multiply(vector2).sum() / norms)
+    
+    def prepare_item(self, text: str, date_str: str = "") -> Dict[str, Any]:
+        """Precompute everything analyze_correlation derives from one activity or message.
         
-        return list(common_terms)
+        Args:
+            text: Output of prepare_activity_text or prepare_message_text
+            date_str: The item's date string (activity "Date" or message "date_formatted")
+            
+        Returns:
+            Dictionary with the text, its structured features, entity sets for
+            matching, its word set and its standardized date
+        """
+        features = self.preprocessor.extract_structured_features(text)
+        return {
+            "text": text,
+            "features": features,
+            "course_codes_lc": frozenset(c.lower() for c in features["course_codes"]),
+            "module_numbers_set": frozenset(features["module_numbers"]),
+            "assignment_numbers_set": frozenset(features["assignment_numbers"]),
+            "word_set": self.word_set(text),
+            "date": self.entity_extractor.standardize_date(date_str)
+        }
+    
+    def message_metadata(self, message: Dict[str, Any]) -> Dict[str, str]:
+        """Extract the message fields reported with each correlation.
+        
+        Args:
+            message: Message data dictionary (email or Slack)
+            
+        Returns:
+            Dictionary with message_id, message_subject, content_snippet,
+            sender_name and timestamp
+        """
+        message_id = message.get("message_id", "")
+        
+        # Extract subject differently based on message type
+        if self.message_type == "email":
+            message_subject = message.get("subject", "")
+        else:  # slack
+            # For Slack, use subject if available, otherwise reconstruct from channel
+            message_subject = message.get("subject", "")
+            if not message_subject and "recipients" in message:
+                for recipient in message["recipients"]:
+                    if recipient.get("type") == "channel":
+                        message_subject = f"Channel: {recipient.get('name', '')}"
+                        break
+        
+        # Extract sender name
+        sender_name = ""
+        if "sender" in message and isinstance(message["sender"], dict):
+            sender_name = message["sender"].get("name", "")
+            if not sender_name and self.message_type == "slack":
+                sender_name = message["sender"].get("slack_id", "")
+        
+        # Get timestamp
+        timestamp = message.get("timestamp", "")
+        
+        # Create content snippet
+        content = message.get("content", "")
+        content_snippet = content[:100] + "..." if len(content) > 100 else content
+        
+        return {
+            "message_id": message_id,
+            "message_subject": message_subject,
+            "content_snippet": content_snippet,
+            "sender_name": sender_name,
+            "timestamp": timestamp
+        }
     
     def analyze_correlation(
             self, 
             activity: Dict[str, Any], 
             message: Dict[str, Any],
             activity_vector: np.ndarray,
-            message_vector: np.ndarray
+            message_vector: np.ndarray,
+            similarity: Optional[float] = None,
+            activity_prepared: Optional[Dict[str, Any]] = None,
+            message_prepared: Optional[Dict[str, Any]] = None,
+            message_metadata: Optional[Dict[str, str]] = None
         ) -> MessageCorrelation:
         """
         Analyze correlation between an activity and a message using configuration parameters.
@@ -499,30 +787,32 @@ class CorrelationAnalyzer:
             message: Message data dictionary (email or Slack)
             activity_vector: TF-IDF vector for activity
             message_vector: TF-IDF vector for message
+            similarity: Precomputed cosine similarity of the two vectors, if available
+            activity_prepared: Precomputed prepare_item() output for the activity
+            message_prepared: Precomputed prepare_item() output for the message
+            message_metadata: Precomputed message_metadata() output for the message
             
         Returns:
             MessageCorrelation object with correlation details
         """
         # Calculate base TF-IDF similarity
-        similarity = cosine_similarity(activity_vector, message_vector)[0][0]
-        
-        # Extract structured features
-        activity_text = self.preprocessor.prepare_activity_text(activity)
-        message_text = self.preprocessor.prepare_message_text(message)
+        if similarity is None:
+            similarity = self.sparse_cosine(activity_vector, message_vector)
         
-        activity_features = self.preprocessor.extract_structured_features(activity_text)
-        message_features = self.preprocessor.extract_structured_features(message_text)
+        # Extract structured features unless the caller precomputed them
+        if activity_prepared is None:
+            activity_prepared = self.prepare_item(self.preprocessor.prepare_activity_text(activity),
+                                                  activity.get("Date", ""))
+        if message_prepared is None:
+            message_prepared = self.prepare_item(self.preprocessor.prepare_message_text(message),
+                                                 message.get("date_formatted", ""))
         
         # Initialize evidence object
         evidence = CorrelationEvidence(tfidf_similarity=similarity)
         
         # Check for course match
-        course_match = False
-        for a_course in activity_features["course_codes"]:
-            for m_course in message_features["course_codes"]:
-                if a_course.lower() == m_course.lower():
-                    course_match = True
-                    break
+        course_match = not activity_prepared["course_codes_lc"].isdisjoint(
+            message_prepared["course_codes_lc"])
         
         # If no course codes extracted, try matching course name
         if not course_match and "Course" in activity:
@@ -537,33 +827,28 @@ class CorrelationAnalyzer:
         evidence.course_match = course_match
         
         # Check for module match
-        module_match = False
-        for a_module in activity_features["module_numbers"]:
-            for m_module in message_features["module_numbers"]:
-                if a_module == m_module:
-                    module_match = True
-                    break
+        module_match = not activity_prepared["module_numbers_set"].isdisjoint(
+            message_prepared["module_numbers_set"])
         
         evidence.module_match = module_match
         
         # Check for assignment match
-        assignment_match = False
-        for a_assignment in activity_features["assignment_numbers"]:
-            for m_assignment in message_features["assignment_numbers"]:
-                if a_assignment == m_assignment:
-                    assignment_match = True
-                    break
+        assignment_match = not activity_prepared["assignment_numbers_set"].isdisjoint(
+            message_prepared["assignment_numbers_set"])
         
         evidence.assignment_match = assignment_match
         
-        # Calculate date proximity
-        activity_date = activity.get("Date", "")
-        message_date = message.get("date_formatted", "")
-        days_diff = self.calculate_date_proximity(activity_date, message_date)
+        # Calculate date proximity from the standardized dates
+        activity_date = activity_prepared["date"]
+        message_date = message_prepared["date"]
+        days_diff = None
+        if activity_date and message_date:
+            days_diff = abs((activity_date - message_date).days)
         evidence.date_proximity_days = days_diff
         
         # Find common key terms
-        evidence.key_term_matches = self.find_common_terms(activity_text, message_text)
+        evidence.key_term_matches = self.common_terms(activity_prepared["word_set"],
+                                                      message_prepared["word_set"])
         
         # Calculate adjusted similarity score with boosts from configuration
         adjusted_similarity = similarity
@@ -600,42 +885,17 @@ class CorrelationAnalyzer:
         elif adjusted_similarity >= threshold_weak:
             confidence_level = "weak"
         
-        # Extract message metadata for result
-        message_id = message.get("message_id", "")
-        
-        # Extract subject differently based on message type
-        if self.message_type == "email":
-            message_subject = message.get("subject", "")
-        else:  # slack
-            # For Slack, use subject if available, otherwise reconstruct from channel
-            message_subject = message.get("subject", "")
-            if not message_subject and "recipients" in message:
-                for recipient in message["recipients"]:
-                    if recipient.get("type") == "channel":
-                        message_subject = f"Channel: {recipient.get('name', '')}"
-                        break
-        
-        # Extract sender name
-        sender_name = ""
-        if "sender" in message and isinstance(message["sender"], dict):
-            sender_name = message["sender"].get("name", "")
-            if not sender_name and self.message_type == "slack":
-                sender_name = message["sender"].get("slack_id", "")
-        
-        # Get timestamp
-        timestamp = message.get("timestamp", "")
-        
-        # Create content snippet
-        content = message.get("content", "")
-        content_snippet = content[:100] + "..." if len(content) > 100 else content
+        # Extract message metadata for result unless the caller cached it
+        if message_metadata is None:
+            message_metadata = self.message_metadata(message)
         
         # Create a result object
         result = MessageCorrelation(
-            message_id=message_id,
-            message_subject=message_subject,
-            content_snippet=content_snippet,
-            sender_name=sender_name,
-            timestamp=timestamp,
+            message_id=message_metadata["message_id"],
+            message_subject=message_metadata["message_subject"],
+            content_snippet=message_metadata["content_snippet"],
+            sender_name=message_metadata["sender_name"],
+            timestamp=message_metadata["timestamp"],
             raw_similarity=similarity,
             adjusted_similarity=adjusted_similarity,
             confidence_level=confidence_level,
@@ -675,7 +935,7 @@ class MessageSimilarityAgent:
         
         # Initialize components with configuration
         self.preprocessor = TextPreprocessor(self.config)
-        self.analyzer = CorrelationAnalyzer(self.config)
+        self.analyzer = CorrelationAnalyzer(self.config, self.preprocessor)
         
         # Storage for data
         self.messages = []
@@ -684,6 +944,40 @@ class MessageSimilarityAgent:
         self.activity_vectors = {}
         self.correlation_results = {}
         
+        # to_dict() output per activity ID, kept alongside correlation_results
+        self._correlation_dict_cache = {}
+        
+        # Row-normalized stack of message_vectors for batched cosine similarity
+        self._message_ids = []
+        self._message_matrix = None
+        self._message_matrix_t = None
+        self._message_dates = None
+        self._entity_index = {}
+        
+        # Per-row views of the message data, aligned with _message_ids so the
+        # candidate loop indexes lists instead of hashing message IDs
+        self._message_rows = []
+        self._message_vector_rows = []
+        self._message_prepared_rows = []
+        self._message_metadata_rows = []
+        
+        # Per-item prepare_item() output, computed once in preprocess_data
+        self._message_prepared = {}
+        self._activity_prepared = {}
+        
+        # prepare_message_text() output per message, built on first preprocess_data
+        self._message_texts = None
+        
+        # message_metadata() output per message, filled in as messages become candidates
+        self._message_metadata = {}
+        
+        # L2-normalized activity matrix from preprocess_data and each ID's row in it
+        self._activity_unit_matrix = None
+        self._activity_rows = {}
+        
+        # Set by load_index() when the message side comes from a saved index
+        self._index_loaded = False
+        
         # Threading resources
         self.correlation_queue = queue.Queue()
         self.correlation_thread = None
@@ -784,8 +1078,30 @@ class MessageSimilarityAgent:
                 logger.error("Data file not found: %s", data_file)
                 return False
             
-            with open(data_file, 'r', encoding='utf-8') as f:
-                self.messages = json.load(f)
+            if HAS_ORJSON:
+                with open(data_file, 'rb') as f:
+                    messages = orjson.loads(f.read())
+            else:
+                with open(data_file, 'r', encoding='utf-8') as f:
+                    messages = json.load(f)
+        except (ValueError, IOError, json.JSONDecodeError) as e:
+            logger.error("Error loading message data: %s", e)
+            return False
+        
+        return self.load_data_obj(messages, data_file)
+    
+    def load_data_obj(self, messages: List[Dict[str, Any]], source: str = "memory") -> bool:
+        """Load message data that has already been parsed.
+        
+        Args:
+            messages: List of message dictionaries
+            source: Where the messages came from, for logging
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.messages = messages
             
             # Validate message type
             valid_messages = []
@@ -839,13 +1155,30 @@ class MessageSimilarityAgent:
                     self.message_by_id[message_id] = message
             
             logger.info("Loaded %d %s messages from %s", 
-                      len(self.messages), self.message_type, data_file)
+                      len(self.messages), self.message_type, source)
             
             # Reset correlation data
             self.message_vectors = {}
             self.activity_vectors = {}
             self.correlation_results = {}
+            self._correlation_dict_cache = {}
             self.correlation_completed = False
+            self._message_ids = []
+            self._message_matrix = None
+            self._message_matrix_t = None
+            self._message_dates = None
+            self._entity_index = {}
+            self._message_rows = []
+            self._message_vector_rows = []
+            self._message_prepared_rows = []
+            self._message_metadata_rows = []
+            self._message_prepared = {}
+            self._activity_prepared = {}
+            self._activity_unit_matrix = None
+            self._activity_rows = {}
+            self._message_texts = None
+            self._message_metadata = {}
+            self._index_loaded = False
             
             return True
             
@@ -956,25 +1289,335 @@ class MessageSimilarityAgent:
         
         # Prepare texts for fitting the vectorizer
         activity_texts = [self.preprocessor.prepare_activity_text(a) for a in activities]
-        message_texts = [self.preprocessor.prepare_message_text(m) for m in self.messages]
+        
+        # A stateless hashing vectorizer gives the same message vectors whatever the
+        # activities are, so they are kept until different messages are loaded
+        reuse_hashed = (isinstance(self.preprocessor.vectorizer, HashingVectorizer) and
+                        self.preprocessor.preprocessing_config.get("vectorizer") == "hashing" and
+                        self._message_matrix is not None)
+        
+        if self._index_loaded or reuse_hashed:
+            # Vectorizer and message vectors come from load_index() or an earlier
+            # hashing run; only the activities still need transforming
+            logger.info("Reusing message vectors; transforming activities only")
+            activity_matrix = self.preprocessor.vectorizer.transform(activity_texts)
+            self._store_activity_vectors(activities, activity_texts, activity_matrix)
+            logger.info("Preprocessing complete: %d activities, %d messages", 
+                        len(activities), len(self.messages))
+            return
+        
+        # Reuse a cached fit for exactly these messages and activities if one exists
+        cache_dir = self.config.get("preprocessing", {}).get("index_cache_dir")
+        if cache_dir:
+            cache_file, cache_fingerprint = self._index_cache_file(cache_dir, activity_texts)
+            if os.path.exists(cache_file) and self._restore_index(cache_file, cache_fingerprint,
+                                                                  discard_damaged=True):
+                logger.info("Using cached message index %s", cache_file)
+                activity_matrix = self.preprocessor.vectorizer.transform(activity_texts)
+                self._store_activity_vectors(activities, activity_texts, activity_matrix)
+                logger.info("Preprocessing complete: %d activities, %d messages", 
+                            len(activities), len(self.messages))
+                return
+        
+        # Message texts only change when messages are reloaded
+        if self._message_texts is None:
+            self._message_texts = [self.preprocessor.prepare_message_text(m) for m in self.messages]
+        message_texts = self._message_texts
         all_texts = activity_texts + message_texts
         
-        # Fit vectorizer on all texts
-        self.preprocessor.fit_vectorizer(all_texts)
+        # Fit vectorizer on all texts; the fit pass also yields every vector, which
+        # is split back into activity and message rows. fit_transform leaves column
+        # indices unsorted; sorting them keeps products identical to transform().
+        all_matrix = self.preprocessor.fit_vectorizer(all_texts).tocsr()
+        all_matrix.sort_indices()
+        activity_matrix = all_matrix[:len(activity_texts)]
+        message_matrix = all_matrix[len(activity_texts):]
         
-        # Transform activity texts to vectors
-        for i, activity in enumerate(activities):
-            activity_id = self._get_activity_id(activity)
-            self.activity_vectors[activity_id] = self.preprocessor.vectorizer.transform([activity_texts[i]])
+        self._store_activity_vectors(activities, activity_texts, activity_matrix)
         
-        # Transform message texts to vectors
+        # Transform message texts to vectors; prepared features do not depend on the
+        # fit, so they are kept from earlier runs over the same messages
         for i, message in enumerate(self.messages):
             message_id = message.get("message_id", f"message_{i}")
-            self.message_vectors[message_id] = self.preprocessor.vectorizer.transform([message_texts[i]])
+            self.message_vectors[message_id] = message_matrix[i]
+            if message_id not in self._message_prepared:
+                self._message_prepared[message_id] = self.analyzer.prepare_item(
+                    message_texts[i], message.get("date_formatted", ""))
+        
+        self._build_message_index()
+        
+        if cache_dir:
+            self._write_index(cache_file, cache_fingerprint)
         
         logger.info("Preprocessing complete: %d activities, %d messages", 
                     len(activities), len(self.messages))
     
+    def _store_activity_vectors(self, activities: List[Dict[str, Any]],
+                                activity_texts: List[str], activity_matrix) -> None:
+        """Store each activity's vector row and prepared features by activity ID.
+        
+        Args:
+            activities: Activities in the same order as activity_texts
+            activity_texts: Output of prepare_activity_text for each activity
+            activity_matrix: Vectorizer output with one row per activity
+        """
+        # Normalize every activity row at once rather than one per find_correlations call.
+        # The transform output is ours, so it is normalized in place; the rows kept in
+        # activity_vectors are unit-length copies, which leaves cosine scores unchanged.
+        self._activity_unit_matrix = normalize(activity_matrix, norm='l2', copy=False)
+        self._activity_rows = {}
+        
+        # Transform activity texts to vectors, reusing each text for its features
+        for i, activity in enumerate(activities):
+            activity_id = self._get_activity_id(activity)
+            self.activity_vectors[activity_id] = activity_matrix[i]
+            self._activity_rows[activity_id] = i
+            # First occurrence wins, matching the one whose results get cached
+            if activity_id not in self._activity_prepared:
+                self._activity_prepared[activity_id] = self.analyzer.prepare_item(
+                    activity_texts[i], self._ensure_string_values(activity).get("Date", ""))
+    
+    def _build_message_index(self) -> None:
+        """Build the stacked message matrix, date vector and entity indexes.
+        
+        Derived from message_vectors and _message_prepared, which must be set.
+        """
+        # Stack message vectors into one L2-normalized matrix so each activity is
+        # scored against every message with a single sparse matrix product
+        self._message_ids = list(self.message_vectors)
+        self._message_matrix = normalize(
+            sparse.vstack(list(self.message_vectors.values()), format='csr'), norm='l2', copy=False
+        )
+        # Transpose once so each product is CSR x CSR with no per-activity conversion
+        self._message_matrix_t = self._message_matrix.T.tocsr()
+        self._message_rows = [self.get_message_by_id(message_id) for message_id in self._message_ids]
+        self._message_vector_rows = list(self.message_vectors.values())
+        self._message_prepared_rows = [self._message_prepared[message_id]
+                                       for message_id in self._message_ids]
+        self._message_metadata_rows = [self._message_metadata.get(message_id)
+                                       for message_id in self._message_ids]
+        self._message_dates = np.array(
+            [prepared["date"] or np.datetime64('NaT') for prepared in self._message_prepared_rows],
+            dtype='datetime64[D]'
+        )
+        self._entity_index = self._build_entity_index()
+    
+    def _message_fingerprint(self) -> str:
+        """Hash the loaded messages and the settings that shape their vectors."""
+        digest = hashlib.sha256()
+        for part in (self.messages, self.message_type, self.config.get("field_weights"),
+                     self.config.get("preprocessing"), self.config.get("entity_extraction")):
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def save_index(self, index_file: str) -> bool:
+        """Save the fitted vectorizer and preprocessed messages for a later load_index().
+        
+        Writes index_file (vectorizer and per-message features) and
+        index_file + '.npz' (message vectors).
+        
+        Args:
+            index_file: Path of the index file to write
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not HAS_SKLEARN:
+            logger.error("scikit-learn is not installed - cannot save index")
+            return False
+        
+        if self._message_matrix is None:
+            logger.warning("No preprocessed messages - call preprocess_data before save_index")
+            return False
+        
+        return self._write_index(index_file, self._message_fingerprint())
+    
+    def _write_index(self, index_file: str, fingerprint: str) -> bool:
+        """Write the vectorizer and preprocessed messages under a fingerprint."""
+        try:
+            os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+            # Both files go through temporary files, the fingerprinted one last, so an
+            # interrupted write never leaves a truncated index at either path
+            with _replace_on_success(index_file + '.npz') as f:
+                sparse.save_npz(f, sparse.vstack(list(self.message_vectors.values()), format='csr'))
+            with _replace_on_success(index_file) as f:
+                joblib.dump({
+                    "fingerprint": fingerprint,
+                    "vectorizer": self.preprocessor.vectorizer,
+                    "message_ids": self._message_ids,
+                    "message_prepared": self._message_prepared
+                }, f)
+            logger.info("Saved message index for %d messages to %s",
+                        len(self._message_ids), index_file)
+            return True
+        except (IOError, OSError) as e:
+            logger.error("Error saving message index: %s", e)
+            return False
+    
+    def load_index(self, index_file: str) -> bool:
+        """Load a vectorizer and preprocessed messages written by save_index().
+        
+        The index is only used if it was built from the currently loaded messages
+        with the same text and entity settings. Subsequent preprocess_data calls
+        then transform activities with the saved vectorizer instead of refitting,
+        so its vocabulary and IDF weights are those of the saving run. The file
+        is unpickled, so only load index files this application wrote.
+        
+        Args:
+            index_file: Path of the index file to read
+            
+        Returns:
+            bool: True if the index was loaded, False otherwise
+        """
+        if not HAS_SKLEARN:
+            logger.error("scikit-learn is not installed - cannot load index")
+            return False
+        
+        if not self.messages:
+            logger.warning("No message data loaded - load messages before load_index")
+            return False
+        
+        if not self._restore_index(index_file, self._message_fingerprint()):
+            return False
+        
+        self.activity_vectors = {}
+        self._activity_prepared = {}
+        self._activity_unit_matrix = None
+        self._activity_rows = {}
+        self.correlation_results = {}
+        self._correlation_dict_cache = {}
+        self._index_loaded = True
+        
+        logger.info("Loaded message index for %d messages from %s",
+                    len(self._message_ids), index_file)
+        return True
+    
+    def _restore_index(self, index_file: str, fingerprint: str,
+                       discard_damaged: bool = False) -> bool:
+        """Restore the vectorizer and preprocessed messages if the fingerprint matches.
+        
+        With discard_damaged, an unreadable index is deleted so the caller's refit
+        can write a fresh one instead of every later run failing on it again.
+        """
+        try:
+            index = joblib.load(index_file)
+            message_matrix = sparse.load_npz(index_file + '.npz').tocsr()
+        except Exception as e:
+            # A truncated or corrupt file can fail in zipfile, pickle or numpy with
+            # their own exception types; any of them just means the index is unusable
+            logger.error("Error loading message index from %s: %s", index_file, e)
+            if discard_damaged:
+                for path in (index_file, index_file + '.npz'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            return False
+        
+        if index.get("fingerprint") != fingerprint:
+            logger.warning("Message index %s does not match the loaded messages - ignoring it",
+                           index_file)
+            return False
+        
+        self._install_message_index(index["vectorizer"], index["message_ids"],
+                                    index["message_prepared"], message_matrix)
+        return True
+    
+    def _install_message_index(self, vectorizer, message_ids: List[str],
+                               message_prepared: Dict[str, Dict[str, Any]], message_matrix) -> None:
+        """Adopt a fitted vectorizer and message vectors instead of fitting them.
+        
+        Args:
+            vectorizer: Fitted vectorizer the message vectors came from
+            message_ids: Message ID of each row of message_matrix
+            message_prepared: prepare_item() output per message ID
+            message_matrix: Unnormalized CSR message vectors, one row per message ID
+        """
+        self.preprocessor.vectorizer = vectorizer
+        self._message_prepared = message_prepared
+        self.message_vectors = {message_id: message_matrix[i]
+                                for i, message_id in enumerate(message_ids)}
+        self._build_message_index()
+    
+    def _worker_state(self) -> Dict[str, Any]:
+        """Collect the fitted state background worker processes score against.
+        
+        Workers adopt this state rather than refitting, so their scores match this
+        agent's whether its vectorizer was fitted here or restored by load_index().
+        
+        Returns:
+            Dictionary for _restore_worker_state
+        """
+        return {
+            "vectorizer": self.preprocessor.vectorizer,
+            "message_ids": self._message_ids,
+            "message_prepared": self._message_prepared,
+            "message_matrix": sparse.vstack(self._message_vector_rows, format='csr'),
+            "activity_unit_matrix": self._activity_unit_matrix,
+            "activity_rows": self._activity_rows,
+            "activity_prepared": self._activity_prepared
+        }
+    
+    def _restore_worker_state(self, state: Dict[str, Any]) -> None:
+        """Adopt the fitted state collected by _worker_state in another agent.
+        
+        Args:
+            state: Output of _worker_state
+        """
+        self._install_message_index(state["vectorizer"], state["message_ids"],
+                                    state["message_prepared"], state["message_matrix"])
+        self._activity_unit_matrix = state["activity_unit_matrix"]
+        self._activity_rows = state["activity_rows"]
+        self._activity_prepared = state["activity_prepared"]
+        # Unit-length rows stand in for the raw activity vectors; cosine scores are unchanged
+        self.activity_vectors = {activity_id: self._activity_unit_matrix[row]
+                                 for activity_id, row in self._activity_rows.items()}
+    
+    def _index_cache_file(self, cache_dir: str, activity_texts: List[str]) -> Tuple[str, str]:
+        """Locate the preprocessing cache entry for the loaded messages and these activities.
+        
+        The vectorizer is fitted on activity and message texts together, so the key
+        covers both, plus the scikit-learn version that pickled it.
+        
+        Returns:
+            Tuple of (cache file path, fingerprint stored in it)
+        """
+        digest = hashlib.sha256(self._message_fingerprint().encode('utf-8'))
+        digest.update(sklearn.__version__.encode('utf-8'))
+        for text in activity_texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\0')
+        fingerprint = digest.hexdigest()
+        return os.path.join(cache_dir, f"message_index_{fingerprint[:16]}.joblib"), fingerprint
+    
+    def _build_entity_index(self) -> Dict[str, Any]:
+        """Build inverted indexes from course/module/assignment entities to message rows.
+        
+        Returns:
+            Dictionary of index name to {entity: array of row numbers in _message_matrix}
+        """
+        index = {
+            "course_codes": {},
+            "course_contexts": {},
+            "module_numbers": {},
+            "assignment_numbers": {}
+        }
+        for row, (message, prepared) in enumerate(zip(self._message_rows,
+                                                       self._message_prepared_rows)):
+            for code in prepared["course_codes_lc"]:
+                index["course_codes"].setdefault(code, []).append(row)
+            for number in prepared["module_numbers_set"]:
+                index["module_numbers"].setdefault(number, []).append(row)
+            for number in prepared["assignment_numbers_set"]:
+                index["assignment_numbers"].setdefault(number, []).append(row)
+            
+            course_context = message.get("course_context") if message else None
+            if course_context:
+                index["course_contexts"].setdefault(course_context.lower(), []).append(row)
+        
+        return {name: {key: np.array(rows, dtype=np.intp) for key, rows in entries.items()}
+                for name, entries in index.items()}
+    
     def _get_activity_id(self, activity: Dict[str, Any]) -> str:
         """Generate a stable ID for an activity."""
         if "id" in activity:
@@ -985,11 +1628,37 @@ class MessageSimilarityAgent:
         date = activity.get("Date", "")
         return f"{title}_{course}_{date}"
     
-    def find_correlations(self, activity: Dict[str, Any]) -> List[MessageCorrelation]:
+    def _similarity_block(self, activity_ids: List[str]) -> Dict[str, np.ndarray]:
+        """Score a block of activities against every message with one matrix product.
+        
+        Activities without a preprocessed vector or with cached results are skipped.
+        
+        Args:
+            activity_ids: IDs of the activities in the block
+            
+        Returns:
+            Dictionary of activity ID to its cosine similarity with each message row
+        """
+        block_ids = [activity_id for activity_id in dict.fromkeys(activity_ids)
+                     if activity_id in self._activity_rows
+                     and activity_id not in self.correlation_results]
+        if not block_ids or self._activity_unit_matrix is None:
+            return {}
+        
+        rows = [self._activity_rows[activity_id] for activity_id in block_ids]
+        similarities = (self._activity_unit_matrix[rows] @ self._message_matrix_t).toarray()
+        return dict(zip(block_ids, similarities))
+    
+    def find_correlations(self, activity: Dict[str, Any],
+                          activity_id: Optional[str] = None,
+                          similarities: Optional[np.ndarray] = None) -> List[MessageCorrelation]:
         """Find messages correlated with an activity.
         
         Args:
             activity: Activity data
+            activity_id: ID of the activity, if the caller already computed it
+            similarities: Cosine similarity with each message row, if the caller
+                already computed it (see _similarity_block)
             
         Returns:
             List of correlated messages
@@ -1002,7 +1671,8 @@ class MessageSimilarityAgent:
         activity = self._ensure_string_values(activity)
         
         # Get activity ID once
-        activity_id = self._get_activity_id(activity)
+        if activity_id is None:
+            activity_id = self._get_activity_id(activity)
         
         # Check if already processed
         if activity_id in self.correlation_results:
@@ -1014,30 +1684,81 @@ class MessageSimilarityAgent:
             return []
         
         activity_vector = self.activity_vectors[activity_id]
+        activity_prepared = self._activity_prepared.get(activity_id)
+        if activity_prepared is None:
+            activity_prepared = self.analyzer.prepare_item(
+                self.preprocessor.prepare_activity_text(activity), activity.get("Date", ""))
         results = []
         
-        # Calculate correlation for each message
-        for message_id, message_vector in self.message_vectors.items():
-            message = self.get_message_by_id(message_id)
+        # Cosine similarity against all messages in one sparse matrix product
+        if similarities is None:
+            row = self._activity_rows.get(activity_id)
+            if row is not None:
+                unit_vector = self._activity_unit_matrix[row]
+            else:
+                unit_vector = normalize(activity_vector)
+            similarities = (unit_vector @ self._message_matrix_t).toarray().ravel()
+        
+        # Upper bound on each adjusted score: the raw similarity plus the boosts for
+        # entities the message shares with the activity plus the date boost. Messages
+        # that cannot reach the weak threshold even then are skipped.
+        threshold_weak = self.config.get("correlation", {}).get("threshold_weak", 0.3)
+        upper_bounds = (similarities +
+                        self.analyzer.entity_boost_bounds(activity, activity_prepared,
+                                                          self._entity_index, len(self._message_ids)) +
+                        self.analyzer.date_proximity_boosts(activity_prepared["date"],
+                                                            self._message_dates))
+        
+        # Visit candidates from the highest upper bound down. Once max_results
+        # correlations are found, a candidate whose bound is below the lowest of
+        # them cannot displace it, and neither can any later candidate.
+        max_results = self.config.get("output", {}).get("max_correlations_per_activity", 5)
+        candidates = np.flatnonzero(upper_bounds >= threshold_weak - 1e-9)
+        candidates = candidates[np.argsort(-upper_bounds[candidates], kind='stable')]
+        top_scores = []
+        
+        # Calculate correlation for each candidate message
+        for index in candidates.tolist():
+            if (max_results and len(top_scores) >= max_results and
+                    upper_bounds[index] + 1e-9 < top_scores[0]):
+                break
+            
+            message = self._message_rows[index]
             if not message:
                 continue
+            
+            message_metadata = self._message_metadata_rows[index]
+            if message_metadata is None:
+                message_metadata = self.analyzer.message_metadata(message)
+                self._message_metadata_rows[index] = message_metadata
+                self._message_metadata[self._message_ids[index]] = message_metadata
                 
             result = self.analyzer.analyze_correlation(
                 activity, 
                 message,
                 activity_vector,
-                message_vector
+                self._message_vector_rows[index],
+                similarity=float(similarities[index]),
+                activity_prepared=activity_prepared,
+                message_prepared=self._message_prepared_rows[index],
+                message_metadata=message_metadata
             )
             
             # Only include non-zero confidence results
             if result.confidence_level != "none":
-                results.append(result)
-        
-        # Sort by adjusted similarity score
-        results.sort(key=lambda x: x.adjusted_similarity, reverse=True)
+                results.append((index, result))
+                if max_results:
+                    # Min-heap of the best max_results adjusted scores so far
+                    if len(top_scores) < max_results:
+                        heapq.heappush(top_scores, result.adjusted_similarity)
+                    elif result.adjusted_similarity > top_scores[0]:
+                        heapq.heapreplace(top_scores, result.adjusted_similarity)
+        
+        # Sort by adjusted similarity score, ties in message order
+        results.sort(key=lambda x: (-x[1].adjusted_similarity, x[0]))
+        results = [result for _, result in results]
         
         # Limit results if configured
-        max_results = self.config.get("output", {}).get("max_correlations_per_activity", 5)
         if max_results and len(results) > max_results:
             results = results[:max_results]
         
@@ -1062,26 +1783,42 @@ class MessageSimilarityAgent:
             logger.warning("No message data loaded - cannot process correlations")
             return
             
-        # Preprocess data
+        # Preprocess data, unless every activity already has cached results
         logger.info("Processing correlations for %d activities...", len(activities))
-        self.preprocess_data(activities)
-        
-        # Process each activity
-        for i, activity in enumerate(activities):
-            activity_id = self._get_activity_id(activity)
-            logger.debug("Processing activity %d/%d: %s", 
-                         i+1, len(activities), activity_id)
+        activity_ids = [self._get_activity_id(activity) for activity in activities]
+        if all(activity_id in self.correlation_results for activity_id in activity_ids):
+            logger.info("All activities have cached correlations - skipping preprocessing")
+        else:
+            self.preprocess_data(activities)
             
-            correlations = self.find_correlations(activity)
+            # Spread uncached activities over worker processes if configured; the
+            # loop below then only collects their cached results. The workers share
+            # this agent's fitted state, so no process preprocesses a second time.
+            n_workers = self._worker_count("correlation_workers")
+            if n_workers > 1 and len(activities) > 1:
+                self._background_correlation_parallel(activities, activities, n_workers)
+        
+        # Process activities in blocks, scoring each block with one matrix product
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        activity_has_message = f"Has{self.message_type.capitalize()}"
+        block_rows = max(1, min(_SIMILARITY_BLOCK_ROWS,
+                                _SIMILARITY_BLOCK_BYTES // (4 * max(1, len(self._message_ids)))))
+        for start in range(0, len(activities), block_rows):
+            block = activities[start:start + block_rows]
+            block_ids = activity_ids[start:start + block_rows]
+            block_similarities = self._similarity_block(block_ids)
             
-            # Update activity with correlation information
-            activity_has_message = f"Has{self.message_type.capitalize()}"
-            if correlations:
-                activity[activity_has_message] = True
-                activity["MessageCorrelations"] = [c.to_dict() for c in correlations]
-            else:
-                activity[activity_has_message] = False
-                activity["MessageCorrelations"] = []
+            for i, (activity, activity_id) in enumerate(zip(block, block_ids), start):
+                if debug_enabled:
+                    logger.debug("Processing activity %d/%d: %s", 
+                                 i+1, len(activities), activity_id)
+                
+                correlations = self.find_correlations(activity, activity_id,
+                                                      block_similarities.get(activity_id))
+                
+                # Update activity with correlation information
+                activity[activity_has_message] = bool(correlations)
+                activity["MessageCorrelations"] = self._correlation_dicts(activity_id, correlations)
         
         logger.info("Correlation processing complete")
         self.correlation_completed = True
@@ -1122,35 +1859,27 @@ class MessageSimilarityAgent:
             string_activities = [self._ensure_string_values(activity) for activity in activities]
             self.preprocess_data(string_activities)
             
+            n_workers = self._worker_count("background_workers")
+            if n_workers > 1 and len(activities) > 1:
+                self._background_correlation_parallel(activities, string_activities, n_workers)
+                logger.info("Background correlation completed")
+                self.correlation_completed = True
+                return
+            
             # Process activities in batches
             batch_size = 10
+            last_yield = time.monotonic()
             for i in range(0, len(activities), batch_size):
                 batch = activities[i:i+batch_size]
                 
                 # Process this batch
-                for activity in batch:
-                    # Skip if already processed
-                    activity_id = self._get_activity_id(activity)
-                    if activity_id in self.correlation_results:
-                        continue
-                    
-                    # Ensure string values before processing
-                    string_activity = self._ensure_string_values(activity)
-                    
-                    # Process correlation
-                    correlations = self.find_correlations(string_activity)
-                    
-                    # Update activity with correlation information
-                    activity_has_message = f"Has{self.message_type.capitalize()}"
-                    if correlations:
-                        activity[activity_has_message] = True
-                        activity["MessageCorrelations"] = [c.to_dict() for c in correlations]
-                    else:
-                        activity[activity_has_message] = False
-                        activity["MessageCorrelations"] = []
+                self._process_batch(batch)
                 
-                # Small delay to avoid blocking UI
-                time.sleep(0.01)
+                # Yield to the UI thread once per frame of work instead of sleeping
+                # after every batch
+                if time.monotonic() - last_yield > _UI_YIELD_INTERVAL:
+                    time.sleep(0)
+                    last_yield = time.monotonic()
                 
             logger.info("Background correlation completed")
             self.correlation_completed = True
@@ -1160,6 +1889,143 @@ class MessageSimilarityAgent:
         finally:
             self.is_correlating = False
     
+    def _worker_count(self, setting: str) -> int:
+        """Resolve a worker-process count from the output config (0 or less = all cores).
+        
+        Args:
+            setting: Key in the output config section
+            
+        Returns:
+            Number of worker processes, at least 1
+        """
+        n_workers = self.config.get("output", {}).get(setting, 1)
+        if n_workers is None:
+            return 1
+        if n_workers <= 0:
+            return os.cpu_count() or 1
+        return n_workers
+    
+    def _correlation_dicts(self, activity_id: str,
+                           correlations: List[MessageCorrelation]) -> List[Dict[str, Any]]:
+        """Return to_dict() output for an activity's correlations, converting once.
+        
+        Each call returns fresh dictionaries so callers may modify them.
+        
+        Args:
+            activity_id: ID the correlations are stored under in correlation_results
+            correlations: The activity's correlations
+            
+        Returns:
+            List of correlation dictionaries
+        """
+        return [dict(correlation)
+                for correlation in self._cached_correlation_dicts(activity_id, correlations)]
+    
+    def _cached_correlation_dicts(self, activity_id: str,
+                                  correlations: List[MessageCorrelation]) -> List[Dict[str, Any]]:
+        """Return the shared to_dict() output for an activity's correlations.
+        
+        The returned dictionaries are cached and must not be modified.
+        
+        Args:
+            activity_id: ID the correlations are stored under in correlation_results
+            correlations: The activity's correlations
+            
+        Returns:
+            List of correlation dictionaries
+        """
+        cached = self._correlation_dict_cache.get(activity_id)
+        if cached is None or cached[0] is not correlations:
+            cached = (correlations, [c.to_dict() for c in correlations])
+            self._correlation_dict_cache[activity_id] = cached
+        return cached[1]
+    
+    def _process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Find correlations for one batch of the background worker.
+        
+        The batch is scored against every message with a single matrix product
+        before the per-activity analysis.
+        
+        Args:
+            batch: Activities to update in place with correlation information
+        """
+        # Skip activities already processed, including earlier ones in this batch
+        pending = []
+        processed_ids = set()
+        for activity in batch:
+            activity_id = self._get_activity_id(activity)
+            if activity_id in self.correlation_results or activity_id in processed_ids:
+                continue
+            
+            # Ensure string values before processing
+            string_activity = self._ensure_string_values(activity)
+            string_id = self._get_activity_id(string_activity)
+            processed_ids.add(string_id)
+            pending.append((activity, string_activity, string_id))
+        
+        block_similarities = self._similarity_block([string_id for _, _, string_id in pending])
+        
+        activity_has_message = f"Has{self.message_type.capitalize()}"
+        for activity, string_activity, string_id in pending:
+            # Process correlation
+            correlations = self.find_correlations(string_activity, string_id,
+                                                  block_similarities.get(string_id))
+            
+            # Update activity with correlation information
+            activity[activity_has_message] = bool(correlations)
+            activity["MessageCorrelations"] = self._correlation_dicts(string_id, correlations)
+    
+    def _background_correlation_parallel(self, activities: List[Dict[str, Any]],
+                                         preprocessed_activities: List[Dict[str, Any]],
+                                         n_workers: int) -> None:
+        """Find correlations for activities across a pool of worker processes.
+        
+        Workers adopt this agent's fitted vectorizer and message index (see
+        _worker_state) instead of refitting, so scores match a single-process run.
+        The pool uses the spawn start method because this runs on a background
+        thread, and forking a process with other threads running is unsafe.
+        Shards are collected as they finish, keeping get_correlation_status() current.
+        
+        Args:
+            activities: Activities to update in place with correlation information
+            preprocessed_activities: The same activities as passed to preprocess_data;
+                their IDs are the keys of the shared activity rows and of the results
+            n_workers: Number of worker processes
+        """
+        # Like the serial loop, only the first activity with a given ID is processed
+        pending = {}
+        for activity, preprocessed in zip(activities, preprocessed_activities):
+            activity_id = self._get_activity_id(preprocessed)
+            if activity_id not in self.correlation_results and activity_id not in pending:
+                pending[activity_id] = (activity, preprocessed)
+        if not pending:
+            return
+        
+        activity_ids = list(pending)
+        n_workers = min(n_workers, len(activity_ids))
+        shard_size = -(-len(activity_ids) // n_workers)
+        shards = [activity_ids[i:i + shard_size] for i in range(0, len(activity_ids), shard_size)]
+        logger.info("Correlating %d activities in %d shards across %d processes",
+                    len(activity_ids), len(shards), n_workers)
+        
+        activity_has_message = f"Has{self.message_type.capitalize()}"
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_background_worker,
+                                 initargs=(self.config, self.messages, self._worker_state())) as executor:
+            futures = {
+                executor.submit(_correlate_background_shard,
+                                [(activity_id, pending[activity_id][1]) for activity_id in shard]): shard
+                for shard in shards
+            }
+            for future in as_completed(futures):
+                for activity_id, correlations in zip(futures[future], future.result()):
+                    self.correlation_results[activity_id] = correlations
+                    activity = pending[activity_id][0]
+                    activity[activity_has_message] = bool(correlations)
+                    activity["MessageCorrelations"] = self._correlation_dicts(activity_id,
+                                                                             correlations)
+    
     def get_correlation_status(self) -> Dict[str, Any]:
         """Get status of background correlation processing.
         
@@ -1204,10 +2070,17 @@ class MessageSimilarityAgent:
                 # which may not be the case in all scenarios
                 activity_data = {"id": activity_id}
                 
-                # Count correlations by confidence level
-                strong_count = sum(1 for c in correlations if c.confidence_level == "strong")
-                moderate_count = sum(1 for c in correlations if c.confidence_level == "moderate")
-                weak_count = sum(1 for c in correlations if c.confidence_level == "weak")
+                # Group correlations by confidence level in one pass, reusing the
+                # dictionaries already built when the activities were updated
+                correlation_dict = {"strong": [], "moderate": [], "weak": []}
+                for c, c_dict in zip(correlations,
+                                     self._cached_correlation_dicts(activity_id, correlations)):
+                    group = correlation_dict.get(c.confidence_level)
+                    if group is not None:
+                        group.append(c_dict)
+                strong_count = len(correlation_dict["strong"])
+                moderate_count = len(correlation_dict["moderate"])
+                weak_count = len(correlation_dict["weak"])
                 total_count = len(correlations)
                 
                 # Update summary counts
@@ -1216,13 +2089,6 @@ class MessageSimilarityAgent:
                 results["summary"]["moderate_correlations"] += moderate_count
                 results["summary"]["weak_correlations"] += weak_count
                 
-                # Group correlations by confidence level
-                correlation_dict = {
-                    "strong": [c.to_dict() for c in correlations if c.confidence_level == "strong"],
-                    "moderate": [c.to_dict() for c in correlations if c.confidence_level == "moderate"],
-                    "weak": [c.to_dict() for c in correlations if c.confidence_level == "weak"]
-                }
-                
                 # Add activity result
                 results["results"].append({
                     "activity": activity_data,
@@ -1247,8 +2113,13 @@ class MessageSimilarityAgent:
                       exist_ok=True)
             
             # Write results to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2)
+            if HAS_ORJSON:
+                with open(output_file, 'wb') as f:
+                    f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 |
+                                         orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(results, f, indent=2)
             
             logger.info("Saved correlation results to %s", output_file)
             return True
@@ -1278,3 +2149,23 @@ class MessageSimilarityAgent:
                 # Keep other values as is
                 result[key] = value
         return result
+
+
+# Agent rebuilt in each background worker process by _init_background_worker
+_background_agent = None
+
+
+def _init_background_worker(config: Dict[str, Any], messages: List[Dict[str, Any]],
+                            state: Dict[str, Any]) -> None:
+    """Build a worker's agent from the parent's messages and fitted state (see _worker_state)."""
+    global _background_agent  # pylint: disable=global-statement
+    _background_agent = MessageSimilarityAgent(config)
+    _background_agent.load_data_obj(messages, "parent process")
+    _background_agent._restore_worker_state(state)  # pylint: disable=protected-access
+
+
+def _correlate_background_shard(
+        shard: List[Tuple[str, Dict[str, Any]]]) -> List[List[MessageCorrelation]]:
+    """Find correlations for a shard of (activity ID, activity) pairs in a worker process."""
+    return [_background_agent.find_correlations(activity, activity_id)
+            for activity_id, activity in shard]
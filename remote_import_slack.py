@@ -15,7 +15,10 @@ import logging
 import os
 import re
 import sys
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 # Try to import Slack SDK (optional, for API approach)
 try:
@@ -25,6 +28,32 @@ try:
 except ImportError:
     HAS_SLACK_SDK = False
 
+# Try to import orjson (optional, for faster JSON parsing and serialization)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
+# Try to import pandas (optional, for bulk timestamp conversion)
+try:
+    import pandas as pd
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
+def _positive_int(value):
+    """Argparse type for options that must be a positive integer."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
+
 def parse_arguments():
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(description='Import Slack data for REMOTE.')
@@ -34,6 +63,7 @@ def parse_arguments():
     parser.add_argument('--pretty', action='store_true', help='Output formatted JSON')
     parser.add_argument('--api_token', help='Slack API token (if using API instead of export)')
     parser.add_argument('--channels', help='Comma-separated list of channels to import (all channels if omitted)')
+    parser.add_argument('--workers', type=_positive_int, help='Number of worker processes for export import (default: CPU count)')
     return parser.parse_args()
 
 def setup_logging(verbose=False):
@@ -41,49 +71,47 @@ def setup_logging(verbose=False):
     log_level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def clean_unicode(text):
+# Remove zero-width characters and replace line/paragraph separators with spaces
+_CLEAN_UNICODE_TABLE = str.maketrans({
+    '\u200B': None,
+    '\u200C': None,
+    '\u200D': None,
+    '\uFEFF': None,
+    '\u2028': ' ',
+    '\u2029': ' ',
+})
+
+def clean_unicode(text: str) -> str:
     """Clean invisible Unicode characters from text."""
     if not text:
         return text
     
-    # Remove zero-width characters
-    text = re.sub(r'[\u200B-\u200D\uFEFF]', '', text)
-    
-    # Replace problematic characters
-    text = text.replace('\u2028', ' ').replace('\u2029', ' ')
-    
-    return text
+    return text.translate(_CLEAN_UNICODE_TABLE)
 
-def extract_course_context(text, channel_name=None, channel_topic=None):
-    """Extract course context from message text, channel name, or channel topic."""
-    # Extract course codes like CS101, MATH200, etc.
-    course_pattern = r'\b([A-Z]{2,4})\s*[.-]?\s*(\d{2,4}[A-Z]?)\b'
-    
-    contexts = []
-    
-    # Check channel name first (most reliable)
-    if channel_name:
-        channel_matches = re.findall(course_pattern, channel_name, re.IGNORECASE)
-        if channel_matches:
-            contexts.extend([f"{dept}{num}" for dept, num in channel_matches])
-    
-    # Check channel topic
-    if channel_topic:
-        topic_matches = re.findall(course_pattern, channel_topic, re.IGNORECASE)
-        if topic_matches:
-            contexts.extend([f"{dept}{num}" for dept, num in topic_matches])
+# Course codes like CS101, MATH200, etc.
+_COURSE_RE = re.compile(r'\b([A-Z]{2,4})\s*[.-]?\s*(\d{2,4}[A-Z]?)\b', re.IGNORECASE)
+
+def extract_channel_course_contexts(channel_name: Optional[str] = None,
+                                    channel_topic: Optional[str] = None) -> Set[str]:
+    """Extract the set of course codes named in a channel's name or topic."""
+    contexts = set()
+    for source in (channel_name, channel_topic):
+        if source:
+            contexts.update(f"{dept}{num}" for dept, num in _COURSE_RE.findall(source))
+    return contexts
+
+def extract_course_context(text: str, channel_contexts: Iterable[str] = ()) -> Optional[str]:
+    """Extract course context from message text and the channel's precomputed course codes."""
+    # Channel name and topic matches are the most reliable
+    contexts = set(channel_contexts)
     
-    # Finally check message text
+    # Then check message text
     if text:
-        text_matches = re.findall(course_pattern, text, re.IGNORECASE)
-        if text_matches:
-            contexts.extend([f"{dept}{num}" for dept, num in text_matches])
-    
-    # Make unique and join with commas if multiple courses
-    unique_contexts = list(set(contexts))
+        contexts.update(f"{dept}{num}" for dept, num in _COURSE_RE.findall(text))
     
-    if unique_contexts:
-        return ",".join(unique_contexts)
+    # Join with commas if multiple courses
+    if contexts:
+        return ",".join(contexts)
     
     # If no course context found, check for common academic keywords
     academic_keywords = ['assignment', 'homework', 'project', 'exam', 'quiz', 'lecture', 'class']
@@ -92,277 +120,284 @@ def extract_course_context(text, channel_name=None, channel_topic=None):
     
     return None
 
-def convert_slack_timestamp(ts):
+def convert_slack_timestamp(ts: str) -> Tuple[str, str]:
     """Convert Slack timestamp to ISO 8601 format and formatted date."""
     # Slack timestamps are Unix timestamps in seconds
-    dt = datetime.fromtimestamp(float(ts))
+    dt = datetime.fromtimestamp(float(ts), tz=timezone.utc)
     iso_timestamp = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
     formatted_date = dt.strftime('%b %d')
     return iso_timestamp, formatted_date
 
-def import_from_export(input_dir, channels=None):
-    """Import Slack data from an export directory."""
+def convert_slack_timestamps(ts_list: List[str]) -> Tuple[List[str], List[str]]:
+    """Convert a batch of Slack timestamps to parallel lists of ISO 8601 and formatted dates."""
+    if not ts_list:
+        return [], []
+    
+    # Fall back to per-timestamp conversion if pandas is not available
+    if not HAS_PANDAS:
+        converted = [convert_slack_timestamp(ts) for ts in ts_list]
+        return [iso for iso, _ in converted], [formatted for _, formatted in converted]
+    
+    # Convert the whole batch in one vectorized pass (whole seconds, UTC)
+    seconds = pd.to_numeric(pd.Series(ts_list)).astype('int64')
+    dts = pd.to_datetime(seconds, unit='s', utc=True).dt
+    return dts.strftime('%Y-%m-%dT%H:%M:%SZ').tolist(), dts.strftime('%b %d').tolist()
+
+def _process_one_channel(channel_path, channel_dir, user_cache=None):
+    """Load and process one exported channel directory.
+    
+    Returns a (channel_name, messages, loaded_count) tuple, where loaded_count is the
+    number of messages read before filtering, or None if the channel has no message files.
+    """
+    # Read channel info
+    channel_info = {}
+    info_path = os.path.join(channel_path, 'channel.json')
+    if os.path.isfile(info_path):
+        with open(info_path, 'rb') as f:
+            channel_info = _loads(f.read())
+    
+    # Process message files
+    messages = []
+    with os.scandir(channel_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.name != 'channel.json' and entry.is_file():
+                with open(entry.path, 'rb') as f:
+                    messages.extend(_loads(f.read()))
+    
+    if not messages:
+        return None
+    
+    channel_name = channel_info.get('name', channel_dir)
+    channel_topic = channel_info.get('topic', {}).get('value', '')
+    channel_id = channel_info.get('id', '')
+    
+    return channel_name, process_channel_messages(
+        messages, channel_name, channel_topic, channel_id, user_cache
+    ), len(messages)
+
+def _process_one_dm(dm_path, dm_dir, user_cache=None):
+    """Load and process one exported DM directory.
+    
+    Returns a (dm_id, messages, loaded_count) tuple, where loaded_count is the number
+    of messages read before filtering, or None if the DM has no message files.
+    """
+    # Process message files
+    messages = []
+    with os.scandir(dm_path) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.is_file():
+                with open(entry.path, 'rb') as f:
+                    messages.extend(_loads(f.read()))
+    
+    if not messages:
+        return None
+    
+    return dm_dir, process_dm_messages(messages, dm_dir, user_cache), len(messages)
+
+def _map_directories(func, directories, workers=None, user_cache=None):
+    """Yield func results for each (path, name) pair, using a process pool when there is more than one."""
+    if len(directories) <= 1 or workers == 1:
+        for path, name in directories:
+            yield func(path, name, user_cache)
+        return
+    
+    paths, names = zip(*directories)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(func, paths, names, repeat(user_cache))
+
+def import_from_export(input_dir, channels=None, workers=None, user_cache=None):
+    """Import Slack data from an export directory, yielding messages as they are processed.
+    
+    Channels and DMs are independent, so they are processed in parallel across
+    up to `workers` processes (default: CPU count). Sender names are resolved
+    from `user_cache` as each message is built.
+    """
     logging.info("Importing Slack data from export directory: %s", input_dir)
     
     if not os.path.isdir(input_dir):
         logging.error("Input directory does not exist: %s", input_dir)
         sys.exit(1)
     
-    all_messages = []
+    messages_processed = 0
     channels_processed = 0
     
     # Process channels
     channels_dir = os.path.join(input_dir, 'channels')
     if os.path.isdir(channels_dir):
-        for channel_dir in os.listdir(channels_dir):
-            channel_path = os.path.join(channels_dir, channel_dir)
-            
-            # Skip if not a directory
-            if not os.path.isdir(channel_path):
-                continue
-            
-            # Skip if not in the specified channels (if channels filter is provided)
-            if channels and channel_dir not in channels.split(','):
-                logging.debug("Skipping channel %s (not in filter)", channel_dir)
-                continue
-            
-            # Read channel info
-            channel_info = {}
-            info_path = os.path.join(channel_path, 'channel.json')
-            if os.path.isfile(info_path):
-                with open(info_path, 'r', encoding='utf-8') as f:
-                    channel_info = json.load(f)
-            
-            # Process message files
-            messages = []
-            for filename in os.listdir(channel_path):
-                if filename.endswith('.json') and filename != 'channel.json':
-                    file_path = os.path.join(channel_path, filename)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        channel_messages = json.load(f)
-                        messages.extend(channel_messages)
-            
-            if messages:
-                channel_name = channel_info.get('name', channel_dir)
-                channel_topic = channel_info.get('topic', {}).get('value', '')
-                channel_id = channel_info.get('id', '')
+        channel_filter = set(channels.split(',')) if channels else None
+        channel_dirs = []
+        with os.scandir(channels_dir) as entries:
+            for entry in entries:
+                # Skip if not a directory
+                if not entry.is_dir():
+                    continue
                 
-                # Process messages for this channel
-                channel_messages = process_channel_messages(
-                    messages, channel_name, channel_topic, channel_id
-                )
-                all_messages.extend(channel_messages)
+                # Skip if not in the specified channels (if channels filter is provided)
+                if channel_filter and entry.name not in channel_filter:
+                    logging.debug("Skipping channel %s (not in filter)", entry.name)
+                    continue
                 
+                channel_dirs.append((entry.path, entry.name))
+        
+        for result in _map_directories(_process_one_channel, channel_dirs, workers, user_cache):
+            if result:
+                channel_name, channel_messages, loaded_count = result
+                yield from channel_messages
+                messages_processed += len(channel_messages)
+                
+                # Logged here rather than in the worker, whose records never reach this handler
+                logging.debug("Skipped %d of %d messages in channel %s (not user messages or no academic context)",
+                              loaded_count - len(channel_messages), loaded_count, channel_name)
                 logging.info("Processed %d messages from channel: %s", len(channel_messages), channel_name)
                 channels_processed += 1
     
     # Process direct messages (DMs)
     dms_dir = os.path.join(input_dir, 'direct_messages')
     if os.path.isdir(dms_dir):
-        for dm_dir in os.listdir(dms_dir):
-            dm_path = os.path.join(dms_dir, dm_dir)
-            
-            # Skip if not a directory
-            if not os.path.isdir(dm_path):
-                continue
-            
-            # Process message files
-            messages = []
-            for filename in os.listdir(dm_path):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(dm_path, filename)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        dm_messages = json.load(f)
-                        messages.extend(dm_messages)
-            
-            if messages:
-                # Process messages for this DM
-                dm_messages = process_dm_messages(messages, dm_dir)
-                all_messages.extend(dm_messages)
+        with os.scandir(dms_dir) as entries:
+            # Skip anything that is not a directory
+            dm_dirs = [(entry.path, entry.name) for entry in entries if entry.is_dir()]
+        
+        for result in _map_directories(_process_one_dm, dm_dirs, workers, user_cache):
+            if result:
+                dm_id, dm_messages, loaded_count = result
+                yield from dm_messages
+                messages_processed += len(dm_messages)
                 
-                logging.info("Processed %d messages from DM: %s", len(dm_messages), dm_dir)
+                logging.debug("Skipped %d of %d messages in DM %s (not user messages or no academic context)",
+                              loaded_count - len(dm_messages), loaded_count, dm_id)
+                logging.info("Processed %d messages from DM: %s", len(dm_messages), dm_id)
     
-    logging.info("Total: Processed %d messages from %d channels", len(all_messages), channels_processed)
-    return all_messages
+    logging.info("Total: Processed %d messages from %d channels", messages_processed, channels_processed)
 
-def process_channel_messages(messages, channel_name, channel_topic, channel_id):
-    """Process messages from a channel and convert to common schema."""
-    processed_messages = []
-    threads = {}  # Map parent ts to thread messages
-    
-    # First, organize messages by threads
-    for msg in messages:
-        # Skip if not a user message
-        if 'user' not in msg or 'subtype' in msg and msg['subtype'] != 'thread_broadcast':
-            continue
-        
-        # Check if it's a threaded reply
-        thread_ts = msg.get('thread_ts')
-        if thread_ts and thread_ts != msg.get('ts'):
-            if thread_ts not in threads:
-                threads[thread_ts] = []
-            threads[thread_ts].append(msg)
-    
-    # Process messages
+def _select_academic_messages(messages: List[Dict[str, Any]], channel_contexts: Iterable[str] = (),
+                              allowed_subtypes: Tuple[str, ...] = ()) -> List[Tuple[Dict[str, Any], str, str]]:
+    """Return (msg, text, course_context) tuples for user messages with academic context.
+    
+    The cheap checks run here so that timestamp conversion and schema building
+    only happen for messages that will be kept.
+    """
+    selected = []
     for msg in messages:
         # Skip if not a user message
-        if 'user' not in msg or ('subtype' in msg and msg['subtype'] != 'thread_broadcast'):
+        if 'user' not in msg or ('subtype' in msg and msg['subtype'] not in allowed_subtypes):
             continue
         
-        # Get basic message info
-        ts = msg.get('ts', '')
         text = clean_unicode(msg.get('text', ''))
-        user_id = msg.get('user', '')
-        
-        # Convert timestamp
-        iso_timestamp, formatted_date = convert_slack_timestamp(ts)
+        course_context = extract_course_context(text, channel_contexts)
         
-        # Extract course context
-        course_context = extract_course_context(text, channel_name, channel_topic)
-        
-        # Skip non-academic messages if no course context found
+        # Skip non-academic messages if no course context found; this may run in a
+        # worker process, so skipped messages are counted by the caller, not logged
         if not course_context:
-            logging.debug("Skipping message: No academic context found")
             continue
         
-        # Generate message schema
-        message_schema = {
-            "message_id": ts,
-            "source_type": "slack",
-            "timestamp": iso_timestamp,
-            "date_formatted": formatted_date,
-            "sender": {
-                "name": user_id,  # Will be resolved to actual name later
-                "slack_id": user_id
-            },
-            "recipients": [
-                {
-                    "name": channel_name,
-                    "type": "channel",
-                    "channel_id": channel_id
-                }
-            ],
-            "subject": channel_name,
-            "content": text,
-            "thread_id": msg.get('thread_ts', ts),
-            "parent_message_id": msg.get('thread_ts') if msg.get('thread_ts') != ts else None,
-            "course_context": course_context,
-            "metadata": {
-                "has_attachments": 'files' in msg,
-                "attachments": [],
-                "reactions": [],
-                "mentions": extract_mentions(text)
-            }
-        }
-        
-        # Add attachments
-        if 'files' in msg:
-            for file in msg['files']:
-                attachment = {
-                    "filename": file.get('name', ''),
-                    "url": file.get('url_private', ''),
-                    "size": file.get('size', 0)
-                }
-                message_schema["metadata"]["attachments"].append(attachment)
-        
-        # Add reactions
-        if 'reactions' in msg:
-            for reaction in msg['reactions']:
-                reaction_schema = {
-                    "name": reaction.get('name', ''),
-                    "count": reaction.get('count', 0),
-                    "users": reaction.get('users', [])
-                }
-                message_schema["metadata"]["reactions"].append(reaction_schema)
-        
-        processed_messages.append(message_schema)
+        selected.append((msg, text, course_context))
     
-    return processed_messages
+    return selected
 
-def process_dm_messages(messages, dm_id):
-    """Process messages from a direct message and convert to common schema."""
-    processed_messages = []
-    
-    for msg in messages:
-        # Skip if not a user message
-        if 'user' not in msg or 'subtype' in msg:
-            continue
-        
-        # Get basic message info
-        ts = msg.get('ts', '')
-        text = clean_unicode(msg.get('text', ''))
-        user_id = msg.get('user', '')
-        
-        # Convert timestamp
-        iso_timestamp, formatted_date = convert_slack_timestamp(ts)
-        
-        # Extract course context
-        course_context = extract_course_context(text)
-        
-        # Skip non-academic messages if no course context found
-        if not course_context:
-            continue
-        
-        # Generate message schema
-        message_schema = {
-            "message_id": ts,
-            "source_type": "slack",
-            "timestamp": iso_timestamp,
-            "date_formatted": formatted_date,
-            "sender": {
-                "name": user_id,  # Will be resolved to actual name later
-                "slack_id": user_id
-            },
-            "recipients": [
-                {
-                    "name": "Direct Message",
-                    "type": "dm",
-                    "channel_id": dm_id
-                }
-            ],
-            "subject": "Direct Message",
-            "content": text,
-            "thread_id": msg.get('thread_ts', ts),
-            "parent_message_id": msg.get('thread_ts') if msg.get('thread_ts') != ts else None,
-            "course_context": course_context,
-            "metadata": {
-                "has_attachments": 'files' in msg,
-                "attachments": [],
-                "reactions": [],
-                "mentions": extract_mentions(text)
+def _build_message_schema(msg: Dict[str, Any], text: str, course_context: str,
+                          iso_timestamp: str, formatted_date: str, *,
+                          subject: str, recipient_type: str, channel_id: str,
+                          user_cache: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Convert a single Slack message to common schema."""
+    # Get basic message info
+    ts = msg.get('ts', '')
+    user_id = msg.get('user', '')
+    thread_ts = msg.get('thread_ts')
+    
+    # Generate message schema
+    return {
+        "message_id": ts,
+        "source_type": "slack",
+        "timestamp": iso_timestamp,
+        "date_formatted": formatted_date,
+        "sender": {
+            "name": user_cache.get(user_id, user_id) if user_cache else user_id,
+            "slack_id": user_id
+        },
+        "recipients": [
+            {
+                "name": subject,
+                "type": recipient_type,
+                "channel_id": channel_id
             }
-        }
-        
-        # Add attachments
-        if 'files' in msg:
-            for file in msg['files']:
-                attachment = {
+        ],
+        "subject": subject,
+        "content": text,
+        "thread_id": thread_ts or ts,
+        "parent_message_id": thread_ts if thread_ts != ts else None,
+        "course_context": course_context,
+        "metadata": {
+            "has_attachments": 'files' in msg,
+            "attachments": [
+                {
                     "filename": file.get('name', ''),
                     "url": file.get('url_private', ''),
                     "size": file.get('size', 0)
                 }
-                message_schema["metadata"]["attachments"].append(attachment)
-        
-        # Add reactions
-        if 'reactions' in msg:
-            for reaction in msg['reactions']:
-                reaction_schema = {
+                for file in msg.get('files', ())
+            ],
+            "reactions": [
+                {
                     "name": reaction.get('name', ''),
                     "count": reaction.get('count', 0),
                     "users": reaction.get('users', [])
                 }
-                message_schema["metadata"]["reactions"].append(reaction_schema)
-        
-        processed_messages.append(message_schema)
-    
-    return processed_messages
+                for reaction in msg.get('reactions', ())
+            ],
+            "mentions": extract_mentions(text)
+        }
+    }
+
+def process_channel_messages(messages: List[Dict[str, Any]], channel_name: str, channel_topic: str,
+                             channel_id: str,
+                             user_cache: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Process messages from a channel and convert to common schema."""
+    channel_contexts = extract_channel_course_contexts(channel_name, channel_topic)
+    selected = _select_academic_messages(messages, channel_contexts, ('thread_broadcast',))
+    
+    # Convert timestamps of the kept messages in one batch
+    iso_timestamps, formatted_dates = convert_slack_timestamps([msg.get('ts', '') for msg, _, _ in selected])
+    
+    return [
+        _build_message_schema(
+            msg, text, course_context, iso_timestamp, formatted_date,
+            subject=channel_name, recipient_type="channel", channel_id=channel_id,
+            user_cache=user_cache
+        )
+        for (msg, text, course_context), iso_timestamp, formatted_date
+        in zip(selected, iso_timestamps, formatted_dates)
+    ]
+
+def process_dm_messages(messages: List[Dict[str, Any]], dm_id: str,
+                        user_cache: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Process messages from a direct message and convert to common schema."""
+    selected = _select_academic_messages(messages)
+    
+    # Convert timestamps of the kept messages in one batch
+    iso_timestamps, formatted_dates = convert_slack_timestamps([msg.get('ts', '') for msg, _, _ in selected])
+    
+    return [
+        _build_message_schema(
+            msg, text, course_context, iso_timestamp, formatted_date,
+            subject="Direct Message", recipient_type="dm", channel_id=dm_id,
+            user_cache=user_cache
+        )
+        for (msg, text, course_context), iso_timestamp, formatted_date
+        in zip(selected, iso_timestamps, formatted_dates)
+    ]
+
+# User mentions like <@U012AB3CD>
+_MENTION_RE = re.compile(r'<@([A-Z0-9]+)>')
 
-def extract_mentions(text):
+def extract_mentions(text: str) -> List[str]:
     """Extract user mentions from message text."""
-    mention_pattern = r'<@([A-Z0-9]+)>'
-    return re.findall(mention_pattern, text)
+    # Most messages mention no one, so skip the regex unless a mention marker is present
+    if not text or '<@' not in text:
+        return []
+    return _MENTION_RE.findall(text)
 
-def import_from_api(token, channels=None):
+def import_from_api(token, channels=None, user_cache=None):
     """Import Slack data using the Slack API."""
     if not HAS_SLACK_SDK:
         logging.error("Slack SDK not installed. Install with: pip install slack_sdk")
@@ -400,7 +435,7 @@ def import_from_api(token, channels=None):
                 
                 # Process messages for this channel
                 channel_messages = process_api_messages(
-                    messages, channel_name, channel_topic, channel_id, client
+                    messages, channel_name, channel_topic, channel_id, client, user_cache
                 )
                 all_messages.extend(channel_messages)
                 
@@ -415,59 +450,24 @@ def import_from_api(token, channels=None):
     
     return all_messages
 
-def process_api_messages(messages, channel_name, channel_topic, channel_id, client):
+def process_api_messages(messages, channel_name, channel_topic, channel_id, client, user_cache=None):
     """Process messages from the API and convert to common schema."""
     processed_messages = []
-    
-    for msg in messages:
-        # Skip if not a user message
-        if 'user' not in msg or 'subtype' in msg:
-            continue
-        
-        # Get basic message info
-        ts = msg.get('ts', '')
-        text = clean_unicode(msg.get('text', ''))
-        user_id = msg.get('user', '')
-        
-        # Convert timestamp
-        iso_timestamp, formatted_date = convert_slack_timestamp(ts)
-        
-        # Extract course context
-        course_context = extract_course_context(text, channel_name, channel_topic)
-        
-        # Skip non-academic messages if no course context found
-        if not course_context:
-            continue
-        
-        # Generate message schema
-        message_schema = {
-            "message_id": ts,
-            "source_type": "slack",
-            "timestamp": iso_timestamp,
-            "date_formatted": formatted_date,
-            "sender": {
-                "name": user_id,  # Will be resolved to actual name later
-                "slack_id": user_id
-            },
-            "recipients": [
-                {
-                    "name": channel_name,
-                    "type": "channel",
-                    "channel_id": channel_id
-                }
-            ],
-            "subject": channel_name,
-            "content": text,
-            "thread_id": msg.get('thread_ts', ts),
-            "parent_message_id": msg.get('thread_ts') if msg.get('thread_ts') != ts else None,
-            "course_context": course_context,
-            "metadata": {
-                "has_attachments": False,  # Will check for files in a separate API call
-                "attachments": [],
-                "reactions": [],
-                "mentions": extract_mentions(text)
-            }
-        }
+    channel_contexts = extract_channel_course_contexts(channel_name, channel_topic)
+    selected = _select_academic_messages(messages, channel_contexts)
+    logging.debug("Skipped %d of %d messages in channel %s (not user messages or no academic context)",
+                  len(messages) - len(selected), len(messages), channel_name)
+    
+    # Convert timestamps of the kept messages in one batch
+    iso_timestamps, formatted_dates = convert_slack_timestamps([msg.get('ts', '') for msg, _, _ in selected])
+    
+    for (msg, text, course_context), iso_timestamp, formatted_date in zip(selected, iso_timestamps, formatted_dates):
+        message_schema = _build_message_schema(
+            msg, text, course_context, iso_timestamp, formatted_date,
+            subject=channel_name, recipient_type="channel", channel_id=channel_id,
+            user_cache=user_cache
+        )
+        ts = message_schema["message_id"]
         
         # If this is a parent message with replies, get the thread replies
         if 'thread_ts' in msg and msg['thread_ts'] == ts and msg.get('reply_count', 0) > 0:
@@ -492,16 +492,16 @@ def process_api_messages(messages, channel_name, channel_topic, channel_id, clie
     
     return processed_messages
 
-def resolve_user_names(messages, input_dir=None, client=None):
-    """Resolve user IDs to names."""
+def load_user_cache(input_dir=None, client=None):
+    """Build a map of user IDs to display names from users.json or the API."""
     user_cache = {}
     
     # If using export, read users from users.json
     if input_dir:
         users_file = os.path.join(input_dir, 'users.json')
         if os.path.isfile(users_file):
-            with open(users_file, 'r', encoding='utf-8') as f:
-                users = json.load(f)
+            with open(users_file, 'rb') as f:
+                users = _loads(f.read())
                 for user in users:
                     user_id = user.get('id')
                     real_name = user.get('real_name', user.get('name', user_id))
@@ -519,29 +519,61 @@ def resolve_user_names(messages, input_dir=None, client=None):
         except Exception as e:
             logging.error("Error fetching users from API: %s", str(e))
     
-    # Update messages with user names
-    for message in messages:
-        user_id = message['sender']['slack_id']
-        if user_id in user_cache:
-            message['sender']['name'] = user_cache[user_id]
-    
-    return messages
+    return user_cache
+
+def _dump_message(message, pretty=False):
+    """Serialize a single message to UTF-8 encoded JSON."""
+    if HAS_ORJSON:
+        return orjson.dumps(message, option=orjson.OPT_INDENT_2 if pretty else 0)
+    
+    # Messages are plain trees of dicts and lists, so skip the circular reference check
+    if pretty:
+        data = json.dumps(message, indent=2, separators=(',', ': '), ensure_ascii=False, check_circular=False)
+    else:
+        data = json.dumps(message, separators=(',', ':'), ensure_ascii=False, check_circular=False)
+    return data.encode('utf-8')
 
 def write_json_output(messages, output_file, pretty=False):
-    """Write messages to JSON output file."""
-    logging.info("Writing %d messages to %s", len(messages), output_file)
+    """Write messages to JSON output file, serializing each message as it arrives.
+    
+    Messages are streamed to a temporary file in the output directory, which
+    replaces output_file only once every message has been written, so a failed
+    import never leaves a truncated file over a previous good output.
+    
+    Returns the number of messages written.
+    """
+    logging.info("Writing messages to %s", output_file)
     
     # Create directory if it doesn't exist
     output_dir = os.path.dirname(output_file)
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    # Write JSON file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        if pretty:
-            json.dump(messages, f, indent=2, ensure_ascii=False)
-        else:
-            json.dump(messages, f, ensure_ascii=False)
+    # Write JSON array one element at a time
+    count = 0
+    temp_file = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(b'[')
+            for message in messages:
+                data = _dump_message(message, pretty)
+                if pretty:
+                    # Nest the message one level inside the array
+                    f.write(b',\n  ' if count else b'\n  ')
+                    data = data.replace(b'\n', b'\n  ')
+                elif count:
+                    f.write(b',')
+                f.write(data)
+                count += 1
+            f.write(b'\n]' if pretty and count else b']')
+        os.replace(temp_file, output_file)
+    except BaseException:
+        # Includes SystemExit raised by the importers; drop the partial output
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    
+    return count
 
 def main():
     """Main entry point."""
@@ -555,24 +587,29 @@ def main():
         logging.error("Either --input_dir or --api_token must be specified")
         sys.exit(1)
     
+    # Check the input before any output is written, since messages are streamed
+    if args.input_dir and not os.path.isdir(args.input_dir):
+        logging.error("Input directory does not exist: %s", args.input_dir)
+        sys.exit(1)
+    
+    # Load user names first so they can be resolved while messages are built
+    user_cache = {}
+    if args.input_dir:
+        user_cache = load_user_cache(input_dir=args.input_dir)
+    elif args.api_token and HAS_SLACK_SDK:
+        user_cache = load_user_cache(client=WebClient(token=args.api_token))
+    
     # Import data
     messages = []
     if args.input_dir:
-        messages = import_from_export(args.input_dir, args.channels)
+        messages = import_from_export(args.input_dir, args.channels, args.workers, user_cache)
     elif args.api_token:
-        messages = import_from_api(args.api_token, args.channels)
-    
-    # Resolve user names
-    if args.input_dir:
-        messages = resolve_user_names(messages, input_dir=args.input_dir)
-    elif args.api_token and HAS_SLACK_SDK:
-        client = WebClient(token=args.api_token)
-        messages = resolve_user_names(messages, client=client)
+        messages = import_from_api(args.api_token, args.channels, user_cache)
     
     # Write output
-    write_json_output(messages, args.output_file, args.pretty)
+    count = write_json_output(messages, args.output_file, args.pretty)
     
-    logging.info("Slack data import complete. %d messages written to %s", len(messages), args.output_file)
+    logging.info("Slack data import complete. %d messages written to %s", count, args.output_file)
 
 if __name__ == "__main__":
     main()
@@ -38,6 +38,10 @@ class Sidebar(QWidget):
         self.classes_layout.setContentsMargins(0, 0, 0, 0)
         self.classes_layout.setSpacing(4)
         
+        # Class buttons in layout order, so lookups don't have to walk the layout
+        self._class_buttons = []
+        self._selected_courses_cache = None
+        
         # Add some default classes
         self.add_class("Database Management Systems", True)
         self.add_class("Human-Centered Artificial Intelligence", True)
@@ -106,6 +110,17 @@ class Sidebar(QWidget):
         
         layout.addWidget(events_container)
         
+        # Filter state keys paired with their buttons
+        self._filter_buttons = (
+            ('show_overdue', self.overdue_btn),
+            ('show_submitted', self.submitted_btn),
+            ('show_graded', self.graded_btn),
+            ('show_due', self.due_btn),
+            ('show_past_events', self.past_events_btn),
+            ('show_now_events', self.now_events_btn),
+            ('show_upcoming_events', self.upcoming_events_btn)
+        )
+        
         # Add stretch to push everything to the top
         layout.addStretch()
     
@@ -119,19 +134,27 @@ class Sidebar(QWidget):
         class_btn = ClassButton(name, is_selected=is_selected)
         class_btn.setToolTip(f"Toggle {name} visibility")
         self.classes_layout.addWidget(class_btn)
+        self._class_buttons.append(class_btn)
+        self._selected_courses_cache = None
+        
+        # toggled fires before clicked, so filter callbacks never see a stale selection
+        class_btn.toggled.connect(self._invalidate_selected_courses)
+    
+    def _invalidate_selected_courses(self):
+        """Drop the cached course selection after a class button toggles."""
+        self._selected_courses_cache = None
     
     def get_selected_courses(self):
         """Get the set of selected course names.
         
         Returns:
-            set: Set of selected course names
+            frozenset: Set of selected course names
         """
-        selected_courses = set()
-        for i in range(self.classes_layout.count()):
-            widget = self.classes_layout.itemAt(i).widget()
-            if isinstance(widget, ClassButton) and widget.isChecked():
-                selected_courses.add(widget.text())
-        return selected_courses
+        if self._selected_courses_cache is None:
+            self._selected_courses_cache = frozenset(
+                btn.text() for btn in self._class_buttons if btn.isChecked()
+            )
+        return self._selected_courses_cache
     
     def get_filter_states(self):
         """Get the current state of all filter buttons.
@@ -139,15 +162,7 @@ class Sidebar(QWidget):
         Returns:
             dict: Dictionary containing the state of each filter button
         """
-        return {
-            'show_overdue': self.overdue_btn.isChecked(),
-            'show_submitted': self.submitted_btn.isChecked(),
-            'show_graded': self.graded_btn.isChecked(),
-            'show_due': self.due_btn.isChecked(),
-            'show_past_events': self.past_events_btn.isChecked(),
-            'show_now_events': self.now_events_btn.isChecked(),
-            'show_upcoming_events': self.upcoming_events_btn.isChecked()
-        }
+        return {key: btn.isChecked() for key, btn in self._filter_buttons}
     
     def connect_filters(self, callback):
         """Connect all filter buttons to a callback function.
@@ -156,21 +171,12 @@ class Sidebar(QWidget):
             callback: Function to call when any filter button is clicked
         """
         # Connect class buttons
-        for i in range(self.classes_layout.count()):
-            widget = self.classes_layout.itemAt(i).widget()
-            if isinstance(widget, ClassButton):
-                widget.clicked.connect(callback)
-        
-        # Connect deadline filter buttons
-        self.overdue_btn.clicked.connect(callback)
-        self.submitted_btn.clicked.connect(callback)
-        self.graded_btn.clicked.connect(callback)
-        self.due_btn.clicked.connect(callback)
-        
-        # Connect event filter buttons
-        self.past_events_btn.clicked.connect(callback)
-        self.now_events_btn.clicked.connect(callback)
-        self.upcoming_events_btn.clicked.connect(callback)
+        for btn in self._class_buttons:
+            btn.clicked.connect(callback)
+        
+        # Connect deadline and event filter buttons
+        for _, btn in self._filter_buttons:
+            btn.clicked.connect(callback)
     
     def connect_course_context_change(self, callback):
         """Connect course selection changes to a callback for updating LLM context.
@@ -179,7 +185,5 @@ class Sidebar(QWidget):
             callback: Function to call when course selections change
         """
         # Connect class buttons to the course context callback
-        for i in range(self.classes_layout.count()):
-            widget = self.classes_layout.itemAt(i).widget()
-            if isinstance(widget, ClassButton):
-                widget.clicked.connect(callback)
+        for btn in self._class_buttons:
+            btn.clicked.connect(callback)
@@ -1,7 +1,10 @@
 """
 Style definitions for the REMOTE application.
 """
-import os
+import functools
+import pathlib
+import string
+import types
 
 # Material Design color palette
 PRIMARY = "#6200EE"
@@ -26,157 +29,145 @@ BORDER_COLOR = "#E0E0E0"
 TEXT_PRIMARY = "#333333"
 TEXT_SECONDARY = "#666666"
 
+# Icon used by the date edit drop-down (forward slashes, since QSS treats backslashes as escapes)
+CALENDAR_ICON = (pathlib.Path(__file__).parent / "icons" / "calendar.svg").as_posix()
+
+# Palette configuration for qt-material library (read-only)
+_MATERIAL_PALETTE = types.MappingProxyType({
+    'primary': PRIMARY,
+    'primaryLightColor': PRIMARY_VARIANT,
+    'secondaryColor': SECONDARY,
+    'secondaryLightColor': SECONDARY_VARIANT,
+    'secondaryDarkColor': SECONDARY_VARIANT,
+    'primaryTextColor': ON_PRIMARY,
+    'secondaryTextColor': ON_SECONDARY
+})
+
 def get_material_palette():
-    """Return a palette configuration for qt-material library."""
-    return {
-        'primary': PRIMARY,
-        'primaryLightColor': PRIMARY_VARIANT,
-        'secondaryColor': SECONDARY,
-        'secondaryLightColor': SECONDARY_VARIANT,
-        'secondaryDarkColor': SECONDARY_VARIANT,
-        'primaryTextColor': ON_PRIMARY,
-        'secondaryTextColor': ON_SECONDARY
-    }
+    """Return a palette configuration for qt-material library.
+    
+    The mapping is shared and read-only; copy it with dict() before modifying.
+    """
+    return _MATERIAL_PALETTE
 
-def get_stylesheet():
-    """Return the custom stylesheet for the application."""
-    return f"""
-        QMainWindow {{
-            background-color: {BACKGROUND};
-        }}
-        
-        QSplitter::handle {{
-            background-color: {BORDER_COLOR};
-        }}
-        
-        QSplitter::handle:horizontal {{
+# Stylesheet skeleton; ${NAME} placeholders are filled from the palette
+_STYLESHEET_TEMPLATE = string.Template("""
+        QMainWindow {
+            background-color: ${BACKGROUND};
+        }
+        
+        QSplitter::handle {
+            background-color: ${BORDER_COLOR};
+        }
+        
+        QSplitter::handle:horizontal {
             width: 4px;
             margin: 2px 0px;
             border-radius: 2px;
-        }}
+        }
         
-        QSplitter::handle:vertical {{
+        QSplitter::handle:vertical {
             height: 8px;
             margin: 2px 4px;
             border-radius: 3px;
-        }}
+        }
         
-        QSplitter::handle:hover {{
-            background-color: {PRIMARY};
-        }}
+        QSplitter::handle:hover {
+            background-color: ${PRIMARY};
+        }
         
-        .sidebar {{
-            background-color: {SIDEBAR_BG};
-            border-right: 1px solid {BORDER_COLOR};
-        }}
+        .sidebar {
+            background-color: ${SIDEBAR_BG};
+            border-right: 1px solid ${BORDER_COLOR};
+        }
         
-        .content-area {{
-            background-color: {SURFACE};
-        }}
+        .content-area {
+            background-color: ${SURFACE};
+        }
         
-        .chat-area {{
-            background-color: {BACKGROUND};
-            border-top: 1px solid {BORDER_COLOR};
-        }}
+        .chat-area {
+            background-color: ${BACKGROUND};
+            border-top: 1px solid ${BORDER_COLOR};
+        }
         
-        .section-header {{
+        .section-header {
             font-size: 16px;
             font-weight: bold;
-            color: {TEXT_PRIMARY};
+            color: ${TEXT_PRIMARY};
             margin-bottom: 8px;
-        }}
+        }
         
-        .content-header {{
+        .content-header {
             font-size: 20px;
             font-weight: bold;
-            color: {TEXT_PRIMARY};
+            color: ${TEXT_PRIMARY};
             margin: 0;
             padding: 0;
             line-height: 28px;  /* Match the height of the date widgets */
-        }}
+        }
         
-        .date-header {{
+        .date-header {
             font-size: 14px;
             font-weight: bold;
-            color: {TEXT_PRIMARY};
-        }}
+            color: ${TEXT_PRIMARY};
+        }
         
-        .class-button {{
-            background-color: {SIDEBAR_BG};
-            border: 1px solid {BORDER_COLOR};
+        .class-button, .filter-button {
+            background-color: ${SIDEBAR_BG};
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             padding: 6px 10px;
             text-align: left;
-            color: {TEXT_PRIMARY};
+            color: ${TEXT_PRIMARY};
             margin-bottom: 4px;
-        }}
+        }
         
-        .class-button:checked {{
-            background-color: {SELECTED_BG};
-            border-color: {PRIMARY};
-            color: {PRIMARY};
-        }}
+        .class-button:checked, .filter-button:checked {
+            background-color: ${SELECTED_BG};
+            border-color: ${PRIMARY};
+            color: ${PRIMARY};
+        }
         
-        .class-button:hover {{
-            background-color: {HOVER_BG};
-        }}
+        .class-button:hover, .filter-button:hover {
+            background-color: ${HOVER_BG};
+        }
         
-        .filter-group {{
+        .filter-group {
             margin-top: 8px;
             margin-bottom: 8px;
-        }}
-        
-        .filter-button {{
-            background-color: {SIDEBAR_BG};
-            border: 1px solid {BORDER_COLOR};
-            border-radius: 4px;
-            padding: 6px 10px;
-            text-align: left;
-            color: {TEXT_PRIMARY};
-            margin-bottom: 4px;
-        }}
-        
-        .filter-button:checked {{
-            background-color: {SELECTED_BG};
-            border-color: {PRIMARY};
-            color: {PRIMARY};
-        }}
-        
-        .filter-button:hover {{
-            background-color: {HOVER_BG};
-        }}
+        }
         
-        .activity-item {{
-            background-color: {CARD_BG};
-            border: 1px solid {BORDER_COLOR};
+        .activity-item {
+            background-color: ${CARD_BG};
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 6px;
             padding: 8px;
             margin: 2px 0;
-        }}
+        }
         
-        .activity-item:hover {{
-            border-color: {PRIMARY_VARIANT};
+        .activity-item:hover {
+            border-color: ${PRIMARY_VARIANT};
             box-shadow: 0 1px 3px rgba(0, 0, 0, 0.1);
-        }}
+        }
         
-        .activity-title {{
+        .activity-title {
             font-size: 14px;
             font-weight: bold;
-            color: {TEXT_PRIMARY};
-        }}
+            color: ${TEXT_PRIMARY};
+        }
         
-        .activity-course {{
+        .activity-course {
             font-size: 12px;
-            color: {TEXT_SECONDARY};
-        }}
+            color: ${TEXT_SECONDARY};
+        }
         
-        .activity-status {{
+        .activity-status {
             font-size: 12px;
-            color: {TEXT_SECONDARY};
+            color: ${TEXT_SECONDARY};
             margin-left: 12px;
-        }}
+        }
         
-        .icon-button {{
+        .icon-button {
             background-color: transparent;
             border: none;
             border-radius: 16px;
@@ -184,217 +175,241 @@ def get_stylesheet():
             max-width: 24px;
             min-height: 24px;
             max-height: 24px;
-        }}
+        }
         
-        .icon-button:hover {{
+        .icon-button:hover {
             background-color: rgba(0, 0, 0, 0.05);
-        }}
+        }
         
-        .separator {{
-            color: {BORDER_COLOR};
-        }}
+        .separator {
+            color: ${BORDER_COLOR};
+        }
         
-        .chat-input {{
-            border: 1px solid {BORDER_COLOR};
+        .chat-input {
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             padding: 8px 12px;
             font-size: 13px;
-            background-color: {SURFACE};
-        }}
+            background-color: ${SURFACE};
+        }
         
-        .chat-display {{
-            border: 1px solid {BORDER_COLOR};
+        .chat-display {
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             padding: 12px;
-            background-color: {SURFACE};
+            background-color: ${SURFACE};
             font-size: 13px;
-        }}
+        }
         
-        .date-label {{
+        .date-label {
             font-size: 13px;
-            color: {TEXT_SECONDARY};
+            color: ${TEXT_SECONDARY};
             margin: 0;
             padding: 0;
             line-height: 28px;  /* Match the height of the date widgets */
-        }}
+        }
         
-        .date-field {{
-            border: 1px solid {BORDER_COLOR};
+        .date-field {
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             padding: 4px 8px;
-            background-color: {SURFACE};
+            background-color: ${SURFACE};
             margin: 0;
-        }}
+        }
         
-        QDateEdit {{
-            border: 1px solid {BORDER_COLOR};
+        QDateEdit {
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             padding: 4px 8px;
-            background-color: {SURFACE};
-            color: {TEXT_PRIMARY};
-        }}
+            background-color: ${SURFACE};
+            color: ${TEXT_PRIMARY};
+        }
         
-        QDateEdit::drop-down {{
+        QDateEdit::drop-down {
             border: none;
             width: 20px;
             subcontrol-origin: padding;
             subcontrol-position: center right;
-            image: url({os.path.join(os.path.dirname(__file__), "icons", "calendar.svg")});
-        }}
+            image: url(${CALENDAR_ICON});
+        }
         
-        QDateEdit::down-arrow {{
-            image: url({os.path.join(os.path.dirname(__file__), "icons", "calendar.svg")});
+        QDateEdit::down-arrow {
+            image: url(${CALENDAR_ICON});
             width: 16px;
             height: 16px;
-        }}
+        }
         
-        QCalendarWidget {{
-            color: {TEXT_PRIMARY};
-        }}
+        QCalendarWidget {
+            color: ${TEXT_PRIMARY};
+        }
         
-        QCalendarWidget QAbstractItemView {{
-            color: {TEXT_PRIMARY};
-            background-color: {SURFACE};
-            selection-background-color: {SELECTED_BG};
-            selection-color: {TEXT_PRIMARY};
-        }}
+        QCalendarWidget QAbstractItemView {
+            color: ${TEXT_PRIMARY};
+            background-color: ${SURFACE};
+            selection-background-color: ${SELECTED_BG};
+            selection-color: ${TEXT_PRIMARY};
+        }
         
-        QGroupBox {{
-            border: 1px solid {BORDER_COLOR};
+        QGroupBox {
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             margin-top: 14px;
             font-weight: bold;
-        }}
+        }
         
-        QGroupBox::title {{
+        QGroupBox::title {
             subcontrol-origin: margin;
             subcontrol-position: top left;
             left: 8px;
             padding: 0 3px;
-        }}
+        }
         
-        QScrollBar:vertical {{
+        QScrollBar:vertical {
             border: none;
-            background: {BACKGROUND};
+            background: ${BACKGROUND};
             width: 6px;
             margin: 0px;
-        }}
+        }
         
-        QScrollBar::handle:vertical {{
-            background: {BORDER_COLOR};
+        QScrollBar::handle:vertical {
+            background: ${BORDER_COLOR};
             border-radius: 3px;
             min-height: 20px;
-        }}
+        }
         
-        QScrollBar::handle:vertical:hover {{
-            background: {PRIMARY_VARIANT};
-        }}
+        QScrollBar::handle:vertical:hover {
+            background: ${PRIMARY_VARIANT};
+        }
         
-        QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
+        QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
             height: 0px;
-        }}
+        }
         
-        QScrollBar:horizontal {{
+        QScrollBar:horizontal {
             border: none;
-            background: {BACKGROUND};
+            background: ${BACKGROUND};
             height: 6px;
             margin: 0px;
-        }}
+        }
         
-        QScrollBar::handle:horizontal {{
-            background: {BORDER_COLOR};
+        QScrollBar::handle:horizontal {
+            background: ${BORDER_COLOR};
             border-radius: 3px;
             min-width: 20px;
-        }}
+        }
         
-        QScrollBar::handle:horizontal:hover {{
-            background: {PRIMARY_VARIANT};
-        }}
+        QScrollBar::handle:horizontal:hover {
+            background: ${PRIMARY_VARIANT};
+        }
         
-        QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {{
+        QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {
             width: 0px;
-        }}
+        }
         
-        .chat-message {{
-            background-color: {SURFACE};
-            border: 1px solid {BORDER_COLOR};
-            border-radius: 12px;
-            padding: 12px 16px;  /* Increased padding */
-            margin: 6px 4px;  /* Increased margin */
-            color: {TEXT_PRIMARY};
-        }}
-        
-        .chat-message-user {{
-            background-color: {SELECTED_BG};
-            border: 1px solid {PRIMARY};
+        .chat-message-user {
+            background-color: ${SELECTED_BG};
+            border: 1px solid ${PRIMARY};
             border-radius: 12px;
             padding: 8px 12px;
             margin: 4px 0;
             text-align: right;
-            color: {TEXT_PRIMARY};
-        }}
+            color: ${TEXT_PRIMARY};
+        }
         
-        .chat-message {{
-            background-color: {SURFACE};
-            border: 1px solid {BORDER_COLOR};
+        .chat-message {
+            background-color: ${SURFACE};
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 12px;
             padding: 8px 16px;  /* Reduced top/bottom padding from 12px to 10px */
             margin: 1px 4px;     /* Reduced top/bottom margin from 6px to 2px */
-            color: {TEXT_PRIMARY};
-        }}
+            color: ${TEXT_PRIMARY};
+        }
         
-        .chat-header {{
+        .chat-header {
             font-size: 16px;
             font-weight: bold;
-            color: {TEXT_PRIMARY};
+            color: ${TEXT_PRIMARY};
             margin-bottom: 6px;
-        }}
+        }
         
-        .send-button {{
-            background-color: {PRIMARY};
-            color: {ON_PRIMARY};
+        .send-button {
+            background-color: ${PRIMARY};
+            color: ${ON_PRIMARY};
             border: none;
             border-radius: 4px;
             padding: 6px 12px;
-        }}
+        }
 
-        .send-button:hover {{
-            background-color: {PRIMARY_VARIANT};
-        }}
+        .send-button:hover {
+            background-color: ${PRIMARY_VARIANT};
+        }
 
-        .send-button:pressed {{
-            background-color: {SECONDARY_VARIANT};
-        }}
+        .send-button:pressed {
+            background-color: ${SECONDARY_VARIANT};
+        }
         
-        .chat-header-container {{
-            background-color: {SURFACE};
+        .chat-header-container {
+            background-color: ${SURFACE};
             border-radius: 4px;
-        }}
+        }
         
-        .chat-input-container {{
-            background-color: {SURFACE};
-            border-top: 1px solid {BORDER_COLOR};
+        .chat-input-container {
+            background-color: ${SURFACE};
+            border-top: 1px solid ${BORDER_COLOR};
             padding-top: 8px;
-        }}
+        }
         
-        .thinking-button {{
-            background-color: {HOVER_BG};
-            color: {TEXT_PRIMARY};
-            border: 1px solid {BORDER_COLOR};
+        .thinking-button {
+            background-color: ${HOVER_BG};
+            color: ${TEXT_PRIMARY};
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             padding: 4px 8px;
             margin-top: 4px;
-        }}
+        }
         
-        .thinking-button:hover {{
-            background-color: {SELECTED_BG};
-        }}
+        .thinking-button:hover {
+            background-color: ${SELECTED_BG};
+        }
         
-        .thinking-panel {{
-            background-color: {HOVER_BG};
-            border: 1px solid {BORDER_COLOR};
+        .thinking-panel {
+            background-color: ${HOVER_BG};
+            border: 1px solid ${BORDER_COLOR};
             border-radius: 4px;
             margin: 4px 0px 8px 32px;
             padding: 8px;
-        }}
-    """
\ No newline at end of file
+        }
+    """)
+
+# Values substituted into the stylesheet template, keyed by placeholder name (read-only)
+_STYLESHEET_PALETTE = types.MappingProxyType({
+    'PRIMARY': PRIMARY,
+    'PRIMARY_VARIANT': PRIMARY_VARIANT,
+    'SECONDARY_VARIANT': SECONDARY_VARIANT,
+    'BACKGROUND': BACKGROUND,
+    'SURFACE': SURFACE,
+    'ON_PRIMARY': ON_PRIMARY,
+    'CARD_BG': CARD_BG,
+    'SIDEBAR_BG': SIDEBAR_BG,
+    'HOVER_BG': HOVER_BG,
+    'SELECTED_BG': SELECTED_BG,
+    'BORDER_COLOR': BORDER_COLOR,
+    'TEXT_PRIMARY': TEXT_PRIMARY,
+    'TEXT_SECONDARY': TEXT_SECONDARY,
+    'CALENDAR_ICON': CALENDAR_ICON
+})
+
+@functools.lru_cache(maxsize=8)
+def get_stylesheet(**overrides):
+    """Return the custom stylesheet for the application.
+    
+    Keyword arguments override palette entries by name (e.g. PRIMARY="#BB86FC");
+    valid names are the keys of _STYLESHEET_PALETTE, and any other name raises
+    ValueError. Each distinct set of overrides is rendered once and then cached.
+    """
+    # Checked up front since substitute() silently ignores unused keys; a
+    # raised error is not cached, so a misspelled name takes no cache slot
+    unknown = sorted(set(overrides) - _STYLESHEET_PALETTE.keys())
+    if unknown:
+        raise ValueError(f"Unknown stylesheet palette names: {', '.join(unknown)}")
+    return _STYLESHEET_TEMPLATE.substitute(_STYLESHEET_PALETTE, **overrides)
@@ -5,6 +5,14 @@ This module provides a testing framework for evaluating message similarity
 correlations between educational activities and different message types (email/Slack).
 It supports configurable test parameters and produces detailed result reports.
 
+A run has two phases with different costs:
+- Phase A, correlation (agent.process_correlations), is bound by the agent's
+  similarity scoring; optimize it in the agent or spread it across workers.
+- Phase B, result collection and saving, is pure Python object traversal and
+  JSON output, so it is allocation-bound; prefer orjson, streaming and
+  preallocation there.
+Use --profile to confirm which phase dominates before optimizing.
+
 Author: Marc Leavitt
 Date: April 2025
 """
@@ -14,14 +22,48 @@ import os
 import json
 import csv
 import argparse
+import cProfile
 import logging
+import mmap
 import random
 import time
-from typing import List, Dict, Any, Optional, Union
+from collections import Counter
+from typing import List, Dict, Any, Iterator, Optional, Union
 from datetime import datetime
 
+# Try to import orjson (optional, for faster JSON parsing and serialization)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
+
+def _mmap_json(path: str) -> Any:
+    """Parse a JSON file with orjson straight from a read-only memory map."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize an object to compact UTF-8 JSON."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# Optional multi-pattern matcher for large substring exclusion lists
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
 # Import the unified message similarity agent
-from message_similarity_agent import MessageSimilarityAgent
+from message_similarity_agent import MessageSimilarityAgent, _replace_on_success
 
 # Configure logging
 logging.basicConfig(
@@ -30,7 +72,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-
 class UnifiedTestFramework:
     """Test framework for message similarity with activities across message types."""
     
@@ -43,6 +84,12 @@ class UnifiedTestFramework:
         # Load configuration
         self.config = self._load_config(config)
         
+        # The agent owns correlation parallelism; a top-level n_workers is passed
+        # to it as output.correlation_workers unless that is already set
+        n_workers = self.config.get("n_workers")
+        if n_workers:
+            self.config.setdefault("output", {}).setdefault("correlation_workers", n_workers)
+        
         # Create agent with the same configuration
         self.agent = MessageSimilarityAgent(self.config)
         
@@ -50,6 +97,8 @@ class UnifiedTestFramework:
         self.activities = []
         self.sampled_activities = []
         self.results = {}
+        self.run_timestamp = None
+        self._n_messages = None
         
         logger.info("Initialized Unified Test Framework for message type: %s", 
                    self.config.get("message_type", "email"))
@@ -78,8 +127,8 @@ class UnifiedTestFramework:
         loaded_config = {}
         if isinstance(config, str):
             try:
-                with open(config, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
+                with open(config, 'rb') as f:
+                    loaded_config = _loads(f.read())
                 logger.info("Loaded configuration from file: %s", config)
             except (IOError, json.JSONDecodeError) as e:
                 logger.error("Failed to load configuration from file: %s", e)
@@ -113,14 +162,72 @@ class UnifiedTestFramework:
                 logger.error("Activities CSV file not found: %s", csv_path)
                 return False
             
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                self.activities = list(reader)
+            # Get exclusion criteria from config
+            exclude_types = frozenset(self.config.get("exclude_activity_types", []))
+            exclude_substrings = tuple(self.config.get("exclude_substrings", []))
+            filtering = bool(exclude_types or exclude_substrings)
             
-            logger.info("Loaded %d activities from %s", len(self.activities), csv_path)
+            # Scan each title once against all substrings when the list is large
+            substring_automaton = None
+            if HAS_AHOCORASICK and len(exclude_substrings) >= 4 and all(exclude_substrings):
+                substring_automaton = ahocorasick.Automaton()
+                for substring in exclude_substrings:
+                    substring_automaton.add_word(substring, substring)
+                substring_automaton.make_automaton()
             
-            # Apply activity filtering
-            self._filter_activities()
+            # Stream rows and apply the filters inline so excluded rows are never kept.
+            # Filters read the raw row by column index; only surviving rows become dicts
+            # (the agent annotates activities in place, so they stay dicts).
+            original_count = 0
+            activities = []
+            with open(csv_path, 'r', encoding='utf-8', newline='', buffering=1 << 20) as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                n_fields = len(header)
+                column = {name: i for i, name in enumerate(header)}
+                type_idx = column.get("Event Type")
+                title_idx = column.get("Title")
+                
+                for row in reader:
+                    if not row:
+                        continue
+                    original_count += 1
+                    
+                    # Handle ragged rows the same way csv.DictReader does
+                    extra = None
+                    if len(row) > n_fields:
+                        extra = row[n_fields:]
+                    elif len(row) < n_fields:
+                        row += [None] * (n_fields - len(row))
+                    
+                    if filtering:
+                        # Check event type
+                        event_type = row[type_idx] if type_idx is not None else ""
+                        if event_type in exclude_types:
+                            continue
+                        
+                        # Check title for excluded substrings
+                        title = row[title_idx] if title_idx is not None else ""
+                        if substring_automaton is not None:
+                            if next(substring_automaton.iter(title), None) is not None:
+                                continue
+                        elif any(substring in title for substring in exclude_substrings):
+                            continue
+                    
+                    activity = dict(zip(header, row))
+                    if extra is not None:
+                        activity[None] = extra
+                    activities.append(activity)
+            
+            self.activities = activities
+            logger.info("Loaded %d activities from %s", original_count, csv_path)
+            
+            filtered_count = len(activities)
+            if not filtering:
+                logger.info("No activity filtering criteria specified")
+            elif filtered_count < original_count:
+                logger.info("Filtered activities: %d -> %d (removed %d)", 
+                           original_count, filtered_count, original_count - filtered_count)
             
             return True
             
@@ -131,45 +238,6 @@ class UnifiedTestFramework:
             logger.error("Error loading activities: %s", e)
             return False
     
-    def _filter_activities(self) -> None:
-        """Filter activities based on configuration."""
-        if not self.activities:
-            return
-        
-        original_count = len(self.activities)
-        
-        # Get exclusion criteria from config
-        exclude_types = self.config.get("exclude_activity_types", [])
-        exclude_substrings = self.config.get("exclude_substrings", [])
-        
-        if not exclude_types and not exclude_substrings:
-            logger.info("No activity filtering criteria specified")
-            return
-        
-        filtered_activities = []
-        for activity in self.activities:
-            # Check event type
-            event_type = activity.get("Event Type", "")
-            if event_type in exclude_types:
-                continue
-            
-            # Check title for excluded substrings
-            title = activity.get("Title", "")
-            excluded = False
-            for substring in exclude_substrings:
-                if substring in title:
-                    excluded = True
-                    break
-            
-            if not excluded:
-                filtered_activities.append(activity)
-        
-        filtered_count = len(filtered_activities)
-        if filtered_count < original_count:
-            logger.info("Filtered activities: %d -> %d (removed %d)", 
-                       original_count, filtered_count, original_count - filtered_count)
-            self.activities = filtered_activities
-    
     def sample_activities(self) -> List[Dict[str, Any]]:
         """Sample activities for testing based on configuration.
         
@@ -189,6 +257,8 @@ class UnifiedTestFramework:
             self.sampled_activities = self.activities
         else:
             logger.info("Sampling %d activities from %d total", sample_size, len(self.activities))
+            # random.sample already does a partial Fisher-Yates shuffle when the sample is
+            # a large fraction of the pool, and it honours --seed via random.seed()
             self.sampled_activities = random.sample(self.activities, sample_size)
         
         return self.sampled_activities
@@ -202,18 +272,41 @@ class UnifiedTestFramework:
         Returns:
             True if successful, False otherwise
         """
-        return self.agent.load_data(message_file)
+        if HAS_ORJSON:
+            # Parse from a memory map to avoid holding a second copy of the raw text
+            try:
+                messages = _mmap_json(message_file)
+            except (IOError, ValueError) as e:
+                logger.error("Error loading message data: %s", e)
+                return False
+            loaded = self.agent.load_data_obj(messages, message_file)
+        else:
+            loaded = self.agent.load_data(message_file)
+        
+        if not loaded:
+            return False
+        
+        self._n_messages = len(self.agent.messages)
+        return True
     
-    def run_test(self, activities: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    def run_test(self, activities: Optional[List[Dict[str, Any]]] = None,
+                 summary_only: bool = False,
+                 stream_to: Optional[str] = None,
+                 run_timestamp: Optional[datetime] = None) -> Dict[str, Any]:
         """Run correlation test on activities.
         
         Args:
             activities: List of activities to test, or None to use sampled activities
+            summary_only: Only collect correlation counts, not per-activity results
+            stream_to: Write full results straight to this file instead of keeping
+                the per-activity entries in memory (summary_only is ignored)
+            run_timestamp: Time to record for this run (default: now)
             
         Returns:
             Test results
         """
         test_activities = activities or self.sampled_activities
+        self.run_timestamp = run_timestamp or datetime.now()
         
         if not test_activities:
             logger.error("No activities to test")
@@ -235,7 +328,12 @@ class UnifiedTestFramework:
         execution_time = end_time - start_time
         
         # Collect results
-        results = self._collect_results(test_activities, execution_time)
+        if stream_to:
+            results = self._stream_results(test_activities, execution_time, stream_to)
+            if not results:
+                return {}
+        else:
+            results = self._collect_results(test_activities, execution_time, summary_only)
         self.results = results
         
         logger.info("Test completed in %.2f seconds", execution_time)
@@ -248,60 +346,93 @@ class UnifiedTestFramework:
         return results
     
     def _collect_results(self, activities: List[Dict[str, Any]], 
-                        execution_time: float) -> Dict[str, Any]:
+                        execution_time: float,
+                        summary_only: bool = False) -> Dict[str, Any]:
         """Collect test results into a structured format.
         
         Args:
             activities: Tested activities
             execution_time: Test execution time in seconds
+            summary_only: Skip per-activity grouping and leave "results" empty
             
         Returns:
             Structured test results
         """
-        message_type = self.config.get("message_type", "email")
-        message_field = f"Has{message_type.capitalize()}"
-        correlations_field = "MessageCorrelations"
+        if summary_only:
+            # Tally confidence levels without building any per-activity structures
+            level_counts = Counter()
+            total_count = 0
+            for activity in activities:
+                correlations = activity.get("MessageCorrelations", [])
+                level_counts.update(c.get("confidence_level") for c in correlations)
+                total_count += len(correlations)
+            totals = {
+                "strong": level_counts["strong"],
+                "moderate": level_counts["moderate"],
+                "weak": level_counts["weak"],
+                "total": total_count
+            }
+            activity_results = []
+        else:
+            totals = {"strong": 0, "moderate": 0, "weak": 0, "total": 0}
+            # Preallocate: one entry per activity is known up front
+            activity_results = [None] * len(activities)
+            for i, activity_result in enumerate(self._iter_activity_results(activities, totals)):
+                activity_results[i] = activity_result
         
-        # Count correlations
-        strong_count = 0
-        moderate_count = 0
-        weak_count = 0
-        total_count = 0
+        results = self._build_test_info(activities, execution_time)
+        results["summary"] = self._build_summary(activities, totals)
+        results["results"] = activity_results
+        results["config"] = self.config
         
-        # Create activity results
-        activity_results = []
+        return results
+    
+    def _iter_activity_results(self, activities: List[Dict[str, Any]],
+                               totals: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+        """Yield the result entry for each activity, adding its counts to totals.
+        
+        Args:
+            activities: Tested activities
+            totals: Running strong/moderate/weak/total counts, updated in place
+            
+        Yields:
+            Per-activity result dictionaries
+        """
+        correlations_field = "MessageCorrelations"
         
         for activity in activities:
+            get = activity.get
+            
             # Get correlation data
-            has_correlations = activity.get(message_field, False)
-            correlations = activity.get(correlations_field, [])
+            correlations = get(correlations_field, [])
+            
+            # Group correlations by confidence level in a single pass
+            strong, moderate, weak = [], [], []
+            grouped_correlations = {"strong": strong, "moderate": moderate, "weak": weak}
+            bucket_for = grouped_correlations.get
+            for c in correlations:
+                bucket = bucket_for(c.get("confidence_level"))
+                if bucket is not None:
+                    bucket.append(c)
             
             # Count by confidence level
-            activity_strong = sum(1 for c in correlations if c.get("confidence_level") == "strong")
-            activity_moderate = sum(1 for c in correlations if c.get("confidence_level") == "moderate")
-            activity_weak = sum(1 for c in correlations if c.get("confidence_level") == "weak")
+            activity_strong = len(strong)
+            activity_moderate = len(moderate)
+            activity_weak = len(weak)
             activity_total = len(correlations)
             
             # Add to overall counts
-            strong_count += activity_strong
-            moderate_count += activity_moderate
-            weak_count += activity_weak
-            total_count += activity_total
-            
-            # Group correlations by confidence level
-            grouped_correlations = {
-                "strong": [c for c in correlations if c.get("confidence_level") == "strong"],
-                "moderate": [c for c in correlations if c.get("confidence_level") == "moderate"],
-                "weak": [c for c in correlations if c.get("confidence_level") == "weak"]
-            }
+            totals["strong"] += activity_strong
+            totals["moderate"] += activity_moderate
+            totals["weak"] += activity_weak
+            totals["total"] += activity_total
             
-            # Add activity result
-            activity_result = {
+            yield {
                 "activity": {
-                    "title": activity.get("Title", ""),
-                    "course": activity.get("Course", ""),
-                    "date": activity.get("Date", ""),
-                    "type": activity.get("Event Type", "")
+                    "title": get("Title", ""),
+                    "course": get("Course", ""),
+                    "date": get("Date", ""),
+                    "type": get("Event Type", "")
                 },
                 "correlations": grouped_correlations,
                 "correlation_counts": {
@@ -311,46 +442,95 @@ class UnifiedTestFramework:
                     "total": activity_total
                 }
             }
-            
-            activity_results.append(activity_result)
+    
+    def _build_test_info(self, activities: List[Dict[str, Any]],
+                         execution_time: float) -> Dict[str, Any]:
+        """Build the results dictionary holding the test_info section."""
+        return {
+            "test_info": {
+                "message_type": self.config.get("message_type", "email"),
+                "timestamp": (self.run_timestamp or datetime.now()).isoformat(),
+                "execution_time_seconds": execution_time,
+                "activities_tested": len(activities),
+                "messages_analyzed": (self._n_messages if self._n_messages is not None
+                                      else len(self.agent.messages))
+            }
+        }
+    
+    def _build_summary(self, activities: List[Dict[str, Any]],
+                       totals: Dict[str, int]) -> Dict[str, Any]:
+        """Build the summary section from the collected correlation counts."""
+        total_count = totals["total"]
         
         # Calculate average correlations per activity
         avg_correlations = total_count / len(activities) if activities else 0
         
-        # Create results structure
-        results = {
-            "test_info": {
-                "message_type": message_type,
-                "timestamp": datetime.now().isoformat(),
-                "execution_time_seconds": execution_time,
-                "activities_tested": len(activities),
-                "messages_analyzed": len(self.agent.messages)
-            },
-            "summary": {
-                "activities_analyzed": len(activities),
-                "total_correlations": total_count,
-                "strong_correlations": strong_count,
-                "moderate_correlations": moderate_count,
-                "weak_correlations": weak_count,
-                "avg_correlations_per_activity": avg_correlations,
-                "activity_filtering": {
-                    "original_count": len(self.activities),
-                    "filtered_count": len(activities),
-                    "exclude_types": self.config.get("exclude_activity_types", []),
-                    "exclude_substrings": self.config.get("exclude_substrings", [])
-                }
-            },
-            "results": activity_results,
-            "config": self.config
+        return {
+            "activities_analyzed": len(activities),
+            "total_correlations": total_count,
+            "strong_correlations": totals["strong"],
+            "moderate_correlations": totals["moderate"],
+            "weak_correlations": totals["weak"],
+            "avg_correlations_per_activity": avg_correlations,
+            "activity_filtering": {
+                "original_count": len(self.activities),
+                "filtered_count": len(activities),
+                "exclude_types": self.config.get("exclude_activity_types", []),
+                "exclude_substrings": self.config.get("exclude_substrings", [])
+            }
         }
+    
+    def _stream_results(self, activities: List[Dict[str, Any]], execution_time: float,
+                        output_file: str) -> Dict[str, Any]:
+        """Write test results to a JSON file one activity at a time.
         
-        return results
+        The per-activity entries are serialized as they are built, so the full
+        results list is never held in memory. The summary is written after the
+        entries since it depends on their counts.
+        
+        Args:
+            activities: Tested activities
+            execution_time: Test execution time in seconds
+            output_file: Path to output file
+            
+        Returns:
+            Test results without the per-activity entries, or an empty dict on error
+        """
+        results = self._build_test_info(activities, execution_time)
+        totals = {"strong": 0, "moderate": 0, "weak": 0, "total": 0}
+        
+        try:
+            # Create directory if it doesn't exist
+            output_dir = os.path.dirname(output_file)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            
+            with _replace_on_success(output_file) as f:
+                f.write(b'{"test_info": ' + _dumps(results["test_info"]) + b', "results": [')
+                for i, activity_result in enumerate(self._iter_activity_results(activities, totals)):
+                    if i:
+                        f.write(b', ')
+                    f.write(_dumps(activity_result))
+                
+                results["summary"] = self._build_summary(activities, totals)
+                results["config"] = self.config
+                f.write(b'], "summary": ' + _dumps(results["summary"]) +
+                        b', "config": ' + _dumps(self.config) + b'}')
+            
+            logger.info("Streamed test results to %s", output_file)
+            return results
+            
+        except (IOError, TypeError) as e:
+            logger.error("Error streaming results: %s", e)
+            return {}
     
-    def save_results(self, output_file: str) -> bool:
+    def save_results(self, output_file: str, ndjson: bool = False) -> bool:
         """Save test results to JSON file.
         
         Args:
             output_file: Path to output file
+            ndjson: Write newline-delimited JSON: a header line with test_info,
+                summary and config, then one line per activity result
             
         Returns:
             True if successful, False otherwise
@@ -366,8 +546,19 @@ class UnifiedTestFramework:
                 os.makedirs(output_dir, exist_ok=True)
             
             # Write results to file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.results, f, indent=2)
+            if ndjson:
+                header = {key: value for key, value in self.results.items() if key != "results"}
+                with _replace_on_success(output_file) as f:
+                    f.write(_dumps({"header": header}) + b'\n')
+                    for activity_result in self.results.get("results", []):
+                        f.write(_dumps(activity_result) + b'\n')
+            elif HAS_ORJSON:
+                with _replace_on_success(output_file) as f:
+                    f.write(orjson.dumps(self.results,
+                                         option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with _replace_on_success(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.results, f, indent=2)
             
             logger.info("Saved test results to %s", output_file)
             return True
@@ -377,6 +568,17 @@ class UnifiedTestFramework:
             return False
 
 
+def _non_negative_int(value):
+    """Argparse type for options that must be zero or a positive integer."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be a non-negative integer, got {value!r}")
+    return number
+
+
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -414,12 +616,39 @@ def parse_arguments():
         default=None,
         help='Override activity sample size in config'
     )
+    parser.add_argument(
+        '--workers',
+        type=_non_negative_int,
+        default=None,
+        help='Override number of correlation worker processes in config, 0 for all cores (output.correlation_workers)'
+    )
     parser.add_argument(
         '--seed',
         type=int,
         default=None,
         help='Random seed for activity sampling'
     )
+    parser.add_argument(
+        '--summary-only',
+        action='store_true',
+        help='Only record correlation counts, not per-activity results'
+    )
+    output_mode = parser.add_mutually_exclusive_group()
+    output_mode.add_argument(
+        '--stream',
+        action='store_true',
+        help='Write per-activity results to the output file as they are collected'
+    )
+    output_mode.add_argument(
+        '--ndjson',
+        action='store_true',
+        help='Save results as newline-delimited JSON (one line per activity)'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile the test run with cProfile and save stats next to the output file'
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -446,8 +675,8 @@ def main():
     config = None
     if args.config:
         try:
-            with open(args.config, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            with open(args.config, 'rb') as f:
+                config = _loads(f.read())
                 logger.info("Loaded configuration from %s", args.config)
         except (IOError, json.JSONDecodeError) as e:
             logger.error("Error loading configuration: %s", e)
@@ -463,6 +692,9 @@ def main():
     if args.sample_size:
         config["activity_sample_size"] = args.sample_size
     
+    if args.workers is not None:
+        config.setdefault("output", {})["correlation_workers"] = args.workers
+    
     # Create test framework
     framework = UnifiedTestFramework(config)
     
@@ -479,23 +711,39 @@ def main():
     # Sample activities
     framework.sample_activities()
     
-    # Run test
-    results = framework.run_test()
+    # One timestamp for both the results and the default output filename
+    run_timestamp = datetime.now()
     
-    if not results:
-        logger.error("Test failed")
-        return 1
-    
-    # Save results
+    # Determine output file
     if args.output:
         output_file = args.output
     else:
         # Generate default output filename
         message_type = config.get("message_type", "email")
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = run_timestamp.strftime("%Y%m%d_%H%M%S")
         output_file = f"{message_type}_similarity_results_{timestamp}.json"
     
-    if not framework.save_results(output_file):
+    # Run test
+    run_kwargs = {
+        "summary_only": args.summary_only,
+        "stream_to": output_file if args.stream else None,
+        "run_timestamp": run_timestamp
+    }
+    if args.profile:
+        profiler = cProfile.Profile()
+        results = profiler.runcall(framework.run_test, **run_kwargs)
+        profile_file = os.path.splitext(output_file)[0] + ".pstats"
+        profiler.dump_stats(profile_file)
+        logger.info("Saved profile stats to %s", profile_file)
+    else:
+        results = framework.run_test(**run_kwargs)
+    
+    if not results:
+        logger.error("Test failed")
+        return 1
+    
+    # Save results (already written when streaming)
+    if not args.stream and not framework.save_results(output_file, ndjson=args.ndjson):
         logger.error("Failed to save results to %s", output_file)
         return 1
     